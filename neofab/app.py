@@ -22,11 +22,17 @@ import logging
 import re
 import math
 import struct
+import unicodedata
 import secrets
-from time import perf_counter
-from urllib.parse import parse_qs, urlparse
+import uuid
+from functools import lru_cache
+from time import perf_counter, time as unix_time
+from types import MappingProxyType
+from urllib.parse import parse_qs, quote, urlparse
 
-from sqlalchemy import func, or_, text
+from sqlalchemy import and_, case, func, insert, lambda_stmt, or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import load_only, raiseload, selectinload
 
 from markupsafe import Markup, escape
 from werkzeug.exceptions import RequestEntityTooLarge
@@ -42,6 +48,7 @@ from flask import (
     jsonify,
     send_from_directory,
     abort,
+    make_response,
 )
 
 from flask_login import (
@@ -54,18 +61,19 @@ from flask_login import (
 
 from werkzeug.utils import secure_filename
 
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Mapping, Tuple, Optional
 from io import BytesIO
 
 from PIL import Image, ImageDraw
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape, Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape, Template
 from config import (
     DASHBOARD_COLUMN_DEFS,
     DASHBOARD_ROWS_PER_PAGE_OPTIONS,
     DEFAULT_SETTINGS,
     SETTINGS_FILE,
     is_registration_domain_allowed,
+    coerce_bool,
     coerce_positive_int,
     load_app_settings,
     normalize_dashboard_columns,
@@ -74,6 +82,9 @@ from config import (
 )
 from i18n_utils import DEFAULT_LANG, SUPPORTED_LANGS, get_translations
 from legal_markdown import render_legal_markdown
+from deferred_writes import queue_last_login
+from http_cache import conditional_page, page_etag
+from lookup_cache import get_lookup, get_lookups, lookup_contains
 from notifications import (
     send_announcement_attention_notification,
     send_admin_order_notification,
@@ -109,6 +120,8 @@ from plotter_utils import (
     plotter_poster_costs,
 )
 from models import (
+    DEBUG_RAISE_LAZY_LOADS,
+    check_dummy_password,
     db,
     User,
     UserActivationToken,
@@ -133,7 +146,6 @@ from models import (
     OrderTag,
     Material,
     Color,
-    CostCenter,
     PrinterProfile,
     FilamentMaterial,
     PlotterPaper,
@@ -216,6 +228,7 @@ BASE_DIR = Path(__file__).resolve().parent
 UPLOAD_FOLDER = BASE_DIR / "uploads" / "models"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = str(UPLOAD_FOLDER)
+UPLOAD_ROOT = Path(app.config["UPLOAD_FOLDER"])
 
 # Upload-Ordner f├╝r Projektbilder
 IMAGE_UPLOAD_FOLDER = BASE_DIR / "uploads" / "images"
@@ -265,6 +278,17 @@ PDF_TEMPLATE_PATH = os.environ.get(
 MAX_UPLOAD_SIZE_MB = 200
 app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_SIZE_MB * 1024 * 1024
 
+# Blockgroesse beim Schreiben von Uploads auf die Platte
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+# Obergrenze, die Linux pro sendfile()-Aufruf uebertraegt
+SENDFILE_MAX_CHUNK = 0x7FFFF000
+
+# Downloads optional vom Reverse Proxy ausliefern lassen:
+# - Apache/lighttpd: NEOFAB_USE_X_SENDFILE=1 (Flask setzt X-Sendfile)
+# - nginx: NEOFAB_X_ACCEL_PREFIX=/protected/models -> "internal;"-Location auf UPLOAD_FOLDER
+app.config["USE_X_SENDFILE"] = coerce_bool(os.environ.get("NEOFAB_USE_X_SENDFILE"))
+X_ACCEL_UPLOAD_PREFIX = os.environ.get("NEOFAB_X_ACCEL_PREFIX", "").strip().rstrip("/")
+
 # Einfache Logging-Konfiguration. Debug kann bei Bedarf ueber NEOFAB_LOG_LEVEL=DEBUG
 # aktiviert werden, ist fuer den systemd/Gunicorn-Betrieb aber zu laut.
 LOG_LEVEL_NAME = os.environ.get("NEOFAB_LOG_LEVEL", "INFO").strip().upper()
@@ -275,6 +299,10 @@ app.logger.setLevel(LOG_LEVEL)
 # Auftrags-Status-Codes (interne Werte + Labels)
 ORDER_STATUSES = [(item["key"], item["label"]) for item in ORDER_STATUS_DEFS]
 ORDER_STATUS_VALUES = [item["key"] for item in ORDER_STATUS_DEFS]
+VALID_STATUS = frozenset(ORDER_STATUS_VALUES)
+
+# Erlaubte Endungen fuer 3D-Modelle (STL/3MF)
+ALLOWED_MODEL_EXT = frozenset({"stl", "3mf"})
 
 # Mapping der Status-Codes zu lesbaren Labels
 
@@ -282,6 +310,9 @@ ORDER_STATUS_VALUES = [item["key"] for item in ORDER_STATUS_DEFS]
 
 PRINT_JOB_STATUSES = [(item["key"], item["label"]) for item in PRINT_JOB_STATUS_DEFS]
 PRINT_JOB_STATUS_VALUES = [item["key"] for item in PRINT_JOB_STATUS_DEFS]
+VALID_PRINT_JOB_STATUS = frozenset(PRINT_JOB_STATUS_VALUES)
+# Status, die das Dashboard pro Auftrag neben der Gesamtzahl zaehlt
+PRINT_JOB_SUMMARY_STATUSES = ("started", "finished", "error")
 
 DEFAULT_ORDER_CATEGORIES = [
     {
@@ -330,6 +361,17 @@ db_path = BASE_DIR / "neofab.db"
 app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
 
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# SQLAlchemy 2 nutzt fuer SQLite-Dateien bereits einen QueuePool (check_same_thread=False).
+# Der Cache fuer kompilierte Statements (Default 500) wird vergroessert, da die App
+# deutlich mehr unterschiedliche Queries hat und sonst Eintraege verdraengt werden.
+# Pool-Groesse per Environment anpassbar (z.B. mehr Gunicorn-Threads pro Worker);
+# Defaults entsprechen den SQLAlchemy-Werten. pool_pre_ping ist fuer SQLite unnoetig.
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "query_cache_size": 1200,
+    "pool_size": coerce_positive_int(os.environ.get("NEOFAB_DB_POOL_SIZE"), 5),
+    "max_overflow": coerce_positive_int(os.environ.get("NEOFAB_DB_MAX_OVERFLOW"), 10),
+    "pool_timeout": coerce_positive_int(os.environ.get("NEOFAB_DB_POOL_TIMEOUT"), 30),
+}
 
 load_app_settings(app)
 
@@ -355,6 +397,28 @@ def get_status_context(translator=None) -> dict:
     return build_status_context(settings, translator)
 
 
+# Status-Labels/-Styles fuer die Templates pro Sprache; gilt, solange
+# load_app_settings() dasselbe (gecachte) Settings-Objekt liefert
+_template_status_contexts: Dict[str, Tuple[dict, Mapping]] = {}
+
+
+def get_template_status_context(lang: str) -> Mapping:
+    settings = load_app_settings(app)
+    cached = _template_status_contexts.get(lang)
+    if cached and cached[0] is settings:
+        return cached[1]
+
+    lang_trans = get_translations(lang)
+    default_trans = get_translations(DEFAULT_LANG)
+    context = build_status_context(settings, lambda key: lang_trans.get(key, default_trans.get(key, key)))
+    frozen = MappingProxyType({
+        name: MappingProxyType(value) if isinstance(value, dict) else tuple(value)
+        for name, value in context.items()
+    })
+    _template_status_contexts[lang] = (settings, frozen)
+    return frozen
+
+
 # ============================================================
 # Globale Template-Variablen
 # ============================================================
@@ -386,7 +450,7 @@ def inject_globals():
             mode = (current_user.theme_mode or "light").strip().lower()
         return "dark" if mode == "dark" else "light"
 
-    status_context = get_status_context(t)
+    status_context = get_template_status_context(current_language())
     settings = load_app_settings(app)
     theme_mode = current_theme_mode()
     # Keep one Bootswatch base theme for both modes; dark mode is handled via CSS variables.
@@ -412,6 +476,51 @@ def inject_globals():
     }
 
 
+# url_for() in Templates: gleiche Parameter liefern immer dieselbe URL, solange
+# Script-Root/Host gleich bleiben -> beide gehen in den Cache-Key ein.
+@lru_cache(maxsize=4096)
+def _cached_url_for(script_root: str, host: str, endpoint: str, values: tuple) -> str:
+    return url_for(endpoint, **dict(values))
+
+
+def template_url_for(endpoint: str, **values) -> str:
+    try:
+        return _cached_url_for(request.script_root, request.host, endpoint, tuple(sorted(values.items())))
+    except TypeError:
+        # nicht hashbare Parameter (z.B. Listen) -> ungecacht
+        return url_for(endpoint, **values)
+
+
+app.jinja_env.globals["url_for"] = template_url_for
+
+# Kompilierte Templates zusaetzlich als Bytecode im Temp-Verzeichnis ablegen, damit
+# neu gestartete Worker nicht jedes Template erneut parsen/kompilieren
+TEMPLATE_BYTECODE_CACHE = FileSystemBytecodeCache()
+app.jinja_env.bytecode_cache = TEMPLATE_BYTECODE_CACHE
+
+# Haeufig gerenderte Seiten, die beim Start vorab geladen werden
+WARM_TEMPLATES = (
+    "base.html",
+    "landing.html",
+    "login.html",
+    "register.html",
+    "dashboard.html",
+    "order_detail.html",
+    "orders_new.html",
+    "admin.html",
+    "admin_users.html",
+    "admin_user_edit.html",
+)
+
+
+def warm_template_cache() -> None:
+    for name in WARM_TEMPLATES:
+        try:
+            app.jinja_env.get_template(name)
+        except Exception:
+            app.logger.warning("Could not precompile template %s", name, exc_info=True)
+
+
 @app.errorhandler(RequestEntityTooLarge)
 def handle_request_entity_too_large(_error):
     trans = inject_globals().get("t")
@@ -654,6 +763,31 @@ def can_view_order(order: Order, user: User) -> bool:
     return getattr(user, "role", None) == "admin" or order.user_id == user.id or can_manage_order_category(order, user)
 
 
+def load_order_or_404(order_id: int, options=None) -> Order:
+    """
+    Lädt einen Auftrag per Primary Key und prüft die Sichtbarkeit für den
+    aktuellen User. Fehlend und "nicht sichtbar" liefern beide 404.
+    Optional mit Loader-Optionen (z.B. selectinload) fuer die Detailansicht.
+    """
+    order = db.session.get(Order, order_id, options=options)
+    if order is None or not can_view_order(order, current_user):
+        abort(404)
+    return order
+
+
+def load_order_messages(order_id: int) -> list[OrderMessage]:
+    """
+    Nachrichten eines Auftrags in Thread-Reihenfolge inkl. Autor; die User werden
+    per IN-Query vorgeladen statt pro Nachricht einzeln (msg.user im Template).
+    """
+    return (
+        OrderMessage.query.options(selectinload(OrderMessage.user))
+        .filter(OrderMessage.order_id == order_id)
+        .order_by(OrderMessage.created_at.asc(), OrderMessage.id.asc())
+        .all()
+    )
+
+
 def get_visible_order_tabs(order: Order, user: User) -> list[str]:
     category = get_order_category(order)
     tabs = category.tab_keys() if category else ["general", "files", "communication"]
@@ -717,6 +851,9 @@ def ensure_order_file_columns():
             statements.append("ALTER TABLE order_files ADD COLUMN has_3d_preview BOOLEAN NOT NULL DEFAULT 0")
         if "preview_status" not in cols:
             statements.append("ALTER TABLE order_files ADD COLUMN preview_status VARCHAR(50)")
+        if "sha256" not in cols:
+            statements.append("ALTER TABLE order_files ADD COLUMN sha256 VARCHAR(64)")
+        statements.append("CREATE INDEX IF NOT EXISTS ix_order_files_sha256 ON order_files (sha256)")
 
         for stmt in statements:
             db.session.execute(text(stmt))
@@ -1264,6 +1401,36 @@ def ensure_order_archive_columns():
         app.logger.exception("Failed to ensure orders archive columns exist")
 
 
+def ensure_order_last_message_column():
+    """
+    Adds orders.last_message_at and backfills it once from order_messages.
+    """
+    try:
+        exists = db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE type='table' AND name='orders'")
+        ).scalar()
+        if not exists:
+            return
+
+        cols = {
+            row[1]
+            for row in db.session.execute(text("PRAGMA table_info(orders)"))
+        }
+        if "last_message_at" in cols:
+            return
+        db.session.execute(text("ALTER TABLE orders ADD COLUMN last_message_at DATETIME"))
+        db.session.execute(
+            text(
+                "UPDATE orders SET last_message_at = "
+                "(SELECT MAX(created_at) FROM order_messages WHERE order_messages.order_id = orders.id)"
+            )
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Failed to ensure orders.last_message_at exists")
+
+
 def ensure_order_category_schema():
     """
     Ensures order categories, generic work jobs and user category permissions exist.
@@ -1908,6 +2075,25 @@ def ensure_order_read_status_table():
             db.session.commit()
     except Exception:
         app.logger.exception("Failed to ensure order_read_status table exists")
+        return
+
+    # Aeltere Tabellen ohne UNIQUE(order_id, user_id) brauchen den Index fuer das Upsert.
+    try:
+        has_unique_index = any(
+            row[2]
+            for row in db.session.execute(text("PRAGMA index_list(order_read_status)"))
+        )
+        if not has_unique_index:
+            db.session.execute(
+                text(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ix_order_read_status_order_user "
+                    "ON order_read_status (order_id, user_id)"
+                )
+            )
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Failed to ensure unique index on order_read_status")
 
 
 def ensure_user_status_columns():
@@ -2161,6 +2347,112 @@ def ensure_user_password_reset_tokens_table():
         app.logger.exception("Failed to ensure password reset token table exists")
 
 
+def ensure_cost_center_name_index():
+    """
+    Legt den lower(name)-Index fuer Kostenstellen in bestehenden Datenbanken an,
+    damit die Dublettenpruefung im Admin nicht die ganze Tabelle scannt.
+    """
+    try:
+        exists = db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE type='table' AND name='cost_centers'")
+        ).scalar()
+        if not exists:
+            return
+        db.session.execute(
+            text("CREATE INDEX IF NOT EXISTS ix_cost_centers_name_lower ON cost_centers(lower(name))")
+        )
+        db.session.commit()
+    except Exception:
+        app.logger.exception("Failed to ensure cost center name index exists")
+
+
+def ensure_user_email_lower_index():
+    """
+    Normalisiert alte E-Mail-Adressen (trim + lower) und legt den eindeutigen
+    lower(email)-Index an. Adressen, deren normalisierte Form schon vergeben ist,
+    bleiben unveraendert; dann fehlt der Index, bis die Dublette bereinigt ist.
+    """
+    try:
+        db.session.execute(
+            text(
+                'UPDATE "user" SET email = lower(trim(email)) '
+                "WHERE email != lower(trim(email)) "
+                'AND NOT EXISTS (SELECT 1 FROM "user" AS other WHERE other.email = lower(trim("user".email)))'
+            )
+        )
+        db.session.commit()
+        db.session.execute(
+            text('CREATE UNIQUE INDEX IF NOT EXISTS ix_user_email_lower ON "user"(lower(email))')
+        )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Failed to ensure case-insensitive user email index (duplicate e-mail addresses?)")
+
+
+def ensure_master_data_updated_at_columns():
+    """
+    Adds updated_at to materials/colors; the admin lists derive their ETag from it.
+    """
+    try:
+        for table in ("materials", "colors"):
+            exists = db.session.execute(
+                text("SELECT name FROM sqlite_master WHERE type='table' AND name=:name"),
+                {"name": table},
+            ).scalar()
+            if not exists:
+                continue
+            cols = {row[1] for row in db.session.execute(text(f"PRAGMA table_info({table})"))}
+            if "updated_at" not in cols:
+                # SQLite erlaubt bei ADD COLUMN keinen CURRENT_TIMESTAMP-Default, daher nachfuellen
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME"))
+                db.session.execute(text(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP"))
+        db.session.commit()
+    except Exception:
+        app.logger.exception("Failed to ensure master data updated_at columns exist")
+
+
+# (Tabelle, Index-Name, Spalten) fuer Dashboard-/Nachrichten-Abfragen
+ORDER_QUERY_INDEXES = (
+    ("orders", "ix_orders_user_created", "user_id, created_at"),
+    ("orders", "ix_orders_status_created", "status, created_at"),
+    ("orders", "ix_orders_created_at", "created_at"),
+    ("order_messages", "ix_order_messages_order_created", "order_id, created_at"),
+    ("order_read_status", "ix_order_read_status_user_order", "user_id, order_id, last_read_at"),
+)
+# (Tabelle, Index-Name, Spalten, Bedingung) fuer Teilindizes
+PARTIAL_ORDER_QUERY_INDEXES = (
+    ("orders", "ix_orders_user_created_active", "user_id, created_at", "is_archived IS 0"),
+)
+# Durch breitere Indizes ersetzt (gleiche fuehrende Spalten)
+OBSOLETE_ORDER_QUERY_INDEXES = ("ix_order_read_status_user",)
+
+
+def ensure_order_query_indexes():
+    """
+    Legt die Indizes fuer Dashboard, Nachrichten und Lese-Status in bestehenden
+    Datenbanken an (neue Datenbanken bekommen sie ueber die Modelle).
+    """
+    try:
+        tables = {
+            row[0]
+            for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type='table'"))
+        }
+        for table, index_name, columns in ORDER_QUERY_INDEXES:
+            if table in tables:
+                db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})"))
+        for table, index_name, columns, where in PARTIAL_ORDER_QUERY_INDEXES:
+            if table in tables:
+                db.session.execute(
+                    text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns}) WHERE {where}")
+                )
+        for index_name in OBSOLETE_ORDER_QUERY_INDEXES:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        db.session.commit()
+    except Exception:
+        app.logger.exception("Failed to ensure order query indexes exist")
+
+
 with app.app_context():
     ensure_user_preference_columns()
     ensure_user_email_favorites_table()
@@ -2178,6 +2470,7 @@ with app.app_context():
     ensure_order_project_columns()
     ensure_order_estimation_columns()
     ensure_order_archive_columns()
+    ensure_order_last_message_column()
     ensure_order_category_schema()
     ensure_order_area_schema()
     ensure_order_print_jobs_table()
@@ -2185,8 +2478,260 @@ with app.app_context():
     ensure_announcements_table()
     ensure_announcement_reads_table()
     ensure_order_id_sequence_table()
+    ensure_cost_center_name_index()
+    ensure_user_email_lower_index()
+    ensure_master_data_updated_at_columns()
+    ensure_order_query_indexes()
     maybe_cleanup_expired_logs(app, force=True)
 
+warm_template_cache()
+
+
+def save_upload(file_storage, dest_path: Path, digest=None) -> int:
+    """
+    Schreibt eine hochgeladene Datei nach dest_path und liefert die Anzahl geschriebener Bytes.
+    Groessere Uploads liegen bei Werkzeug bereits in einer temporaeren Datei; diese wird
+    per os.sendfile im Kernel kopiert. Sonst (BytesIO, kein sendfile) blockweise kopieren.
+    Mit digest (hashlib-Objekt) wird jeder Block beim Kopieren mitgehasht; sendfile
+    entfaellt dann, weil die Daten fuer den Hash ohnehin durch Python laufen muessen.
+    """
+    stream = file_storage.stream
+    with open(dest_path, "wb") as dst:
+        src_fd = None
+        if digest is None and hasattr(os, "sendfile"):
+            try:
+                src_fd = stream.fileno()
+            except (AttributeError, OSError, ValueError):
+                src_fd = None
+
+        if src_fd is not None:
+            start = stream.tell()
+            offset = start
+            try:
+                # Restgroesse auf einmal anfordern: meist genuegt ein einziger Syscall,
+                # der Kernel teilt sehr grosse Dateien selbst auf (max. ~2 GiB pro Aufruf).
+                remaining = max(os.fstat(src_fd).st_size - start, 0)
+                while remaining > 0:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset, min(remaining, SENDFILE_MAX_CHUNK))
+                    if sent == 0:
+                        break
+                    offset += sent
+                    remaining -= sent
+                return offset - start
+            except OSError:
+                # z.B. Dateisystem ohne sendfile-Unterstuetzung: normal kopieren
+                stream.seek(start)
+                dst.seek(0)
+                dst.truncate()
+
+        written = 0
+        while True:
+            chunk = stream.read(UPLOAD_COPY_BUFFER_SIZE)
+            if not chunk:
+                break
+            if digest is not None:
+                digest.update(chunk)
+            dst.write(chunk)
+            written += len(chunk)
+        return written
+
+
+def order_folder_path(order_id: int) -> Path:
+    """Upload-Unterordner eines Auftrags (Basis-Path wird beim Start einmal gebaut)."""
+    return UPLOAD_ROOT / f"order_{order_id}"
+
+
+def _scandir_files(folder: Path) -> dict:
+    try:
+        with os.scandir(folder) as entries:
+            return {entry.name: entry for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+
+
+def delete_order_files(order_id: int, file_ids) -> int:
+    """
+    Löscht mehrere OrderFile-Einträge eines Auftrags samt Dateien/Thumbnails.
+    Zeilen kommen aus einer IN-Abfrage, die Ordner werden je einmal per scandir
+    gelesen statt pro Datei exists()/unlink(). Der Aufrufer committet.
+    Gibt die Anzahl gelöschter Einträge zurück.
+    """
+    ids = {int(file_id) for file_id in file_ids if file_id}
+    if not ids:
+        return 0
+    order_files = OrderFile.query.filter(OrderFile.order_id == order_id, OrderFile.id.in_(ids)).all()
+    if not order_files:
+        return 0
+
+    order_folder = order_folder_path(order_id)
+    thumb_folder = order_folder / "thumbnails"
+    model_names = set()
+    thumb_names = set()
+    for order_file in order_files:
+        model_names.add(order_file.stored_name)
+        if order_file.thumb_sm_path:
+            thumb_names.add(order_file.thumb_sm_path)
+        if order_file.thumb_lg_path:
+            thumb_names.add(order_file.thumb_lg_path)
+        if order_file.file_type and order_file.file_type.lower() == "stl":
+            thumb_names.update(_build_model_thumbnail_names(order_file.stored_name))
+
+    for folder, names in ((order_folder, model_names), (thumb_folder, thumb_names)):
+        existing = _scandir_files(folder)
+        for name in names:
+            entry = existing.get(name)
+            if entry is None:
+                continue
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                app.logger.warning("[delete_order_files] Could not delete file on disk: %s", entry.path)
+
+    for order_file in order_files:
+        db.session.delete(order_file)
+    return len(order_files)
+
+
+def save_model_upload(file_storage, dest_path: Path) -> Tuple[int, str]:
+    """
+    Speichert ein STL/3MF-Modell und berechnet dabei in einem Durchgang den SHA-256
+    (hashlib nutzt SHA-NI, wo vorhanden). Liegt derselbe Inhalt bereits auf der Platte,
+    wird die neue Datei durch einen Hardlink auf die vorhandene ersetzt.
+    Gibt (Dateigroesse, SHA-256) zurueck.
+    """
+    digest = hashlib.sha256()
+    filesize = save_upload(file_storage, dest_path, digest)
+    sha256 = digest.hexdigest()
+    duplicates = (
+        db.session.query(OrderFile.order_id, OrderFile.stored_name)
+        .filter(OrderFile.sha256 == sha256)
+        .limit(5)
+        .all()
+    )
+    for order_id, stored_name in duplicates:
+        source_path = order_folder_path(order_id) / stored_name
+        if source_path == dest_path:
+            continue
+        link_path = dest_path.with_name(dest_path.name + ".link")
+        try:
+            os.link(source_path, link_path)
+            os.replace(link_path, dest_path)
+        except OSError:
+            continue
+        finally:
+            # Bleibt liegen, wenn replace scheitert oder beide Namen schon derselbe Inode sind
+            try:
+                link_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+        break
+    return filesize, sha256
+
+
+# Alles ausser ASCII-Buchstaben/Ziffern/._- wird in Ablagenamen zu "_"
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def _safe_name(name: str) -> str:
+    """
+    ASCII-Dateiname fuer die Ablage: Umlaute werden auf den Grundbuchstaben
+    reduziert, Pfadanteile verworfen, alles Uebrige in einem Regex-Durchlauf ersetzt.
+    """
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    base_name = ascii_name.replace("\\", "/").rsplit("/", 1)[-1]
+    return _SAFE_NAME_RE.sub("_", base_name).strip("._") or "file"
+
+
+def _existing_id(model, raw_id) -> Optional[int]:
+    if not raw_id:
+        return None
+    try:
+        raw_int = int(raw_id)
+    except (TypeError, ValueError):
+        return None
+    return raw_int if db.session.get(model, raw_int) else None
+
+
+def save_order_file(
+    order: Order,
+    file_storage,
+    trans,
+    material_id=None,
+    color_id=None,
+    note: Optional[str] = None,
+    quantity: int = 1,
+    commit: bool = True,
+) -> Optional[OrderFile]:
+    """
+    Speichert ein hochgeladenes STL/3MF-Modell zu einem Auftrag:
+    Endung pruefen, eindeutiger Name, Datei schreiben (sendfile/Hardlink),
+    OrderFile anlegen, Vorschau erzeugen, committen und Audit-Log schreiben.
+    Mit commit=False committet der Aufrufer und ruft danach log_order_file_upload().
+    Bei ungueltiger Endung wird eine Meldung geflasht und None zurueckgegeben.
+    """
+    original_name = file_storage.filename
+    safe_name = _safe_name(original_name)
+
+    # Dateityp/Endung bestimmen (ohne Punkt)
+    _, ext = os.path.splitext(safe_name)
+    ext = ext.lower().lstrip(".")  # "stl" oder "3mf"
+    if ext not in ALLOWED_MODEL_EXT:
+        flash(trans("flash_invalid_file"), "warning")
+        return None
+
+    # Eindeutigen Dateinamen vorab bauen: <uuid>_<safe_name> (kein flush() fuer die ID noetig)
+    stored_name = f"{uuid.uuid4().hex}_{safe_name}"
+
+    order_folder = order_folder_path(order.id)
+    order_folder.mkdir(parents=True, exist_ok=True)
+    full_path = order_folder / stored_name
+
+    filesize, sha256 = save_model_upload(file_storage, full_path)
+
+    order_file = OrderFile(
+        order_id=order.id,
+        original_name=original_name,
+        stored_name=stored_name,
+        file_type=ext,
+        material_id=_existing_id(Material, material_id),
+        color_id=_existing_id(Color, color_id),
+        note=note,
+        quantity=quantity,
+        filesize=filesize,
+        sha256=sha256,
+        uploaded_at=datetime.utcnow(),
+    )
+    db.session.add(order_file)
+    update_order_file_preview(order_file, full_path)
+    if commit:
+        db.session.commit()
+        log_order_file_upload(order_file)
+    return order_file
+
+
+def log_order_file_upload(order_file: OrderFile) -> None:
+    write_audit_log(
+        app,
+        "file_uploaded",
+        user=current_user,
+        details={
+            "order_id": order_file.order_id,
+            "file_kind": "model",
+            "file_id": order_file.id,
+            "original_name": order_file.original_name,
+            "stored_name": order_file.stored_name,
+            "file_type": order_file.file_type,
+            "filesize": order_file.filesize,
+            "quantity": order_file.quantity,
+            "material_id": order_file.material_id,
+            "color_id": order_file.color_id,
+        },
+    )
+    app.logger.debug(
+        "[save_order_file] Uploaded file for order %s: OrderFile.id=%s, stored_name=%r",
+        order_file.order_id, order_file.id, order_file.stored_name,
+    )
+
 
 def save_image_thumbnail(source_path: Path, target_path: Path, max_width: int = THUMBNAIL_MAX_WIDTH) -> bool:
     """
@@ -2617,7 +3162,7 @@ def save_model_thumbnail_from_image(image: Image.Image, thumb_sm_path: Path, thu
 
 def update_order_file_preview(order_file: OrderFile, source_path: Path) -> None:
     file_type = (order_file.file_type or "").lower()
-    if file_type not in {"stl", "3mf"}:
+    if file_type not in ALLOWED_MODEL_EXT:
         order_file.has_3d_preview = False
         order_file.preview_status = "unsupported"
         return
@@ -2836,9 +3381,11 @@ login_manager.login_view = "login"  # wohin bei @login_required ohne Login?
 # Login-Backend
 # ============================================================
 
+# Flask-Login ruft den Loader hoechstens einmal pro Request auf und merkt sich den
+# User in g._login_user; ein eigener g-Cache waere doppelt.
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 
 # ============================================================
@@ -2858,7 +3405,7 @@ def create_admin():
     email = input("Admin email: ").strip().lower()
     password = input("Admin password: ").strip()
 
-    if User.query.filter_by(email=email).first():
+    if User.email_taken(email):
         print("Error: User with this email already exists.")
         return
 
@@ -2876,11 +3423,14 @@ def init_stammdaten():
     Beispielaufruf:
         flask --app app init-stammdaten
     """
+    # Vorhandene Namen einmal laden und fehlende Zeilen gesammelt einfuegen
     base_materials = ["PLA", "ABS", "PETG", "TPU"]
-    for name in base_materials:
-        if not Material.query.filter_by(name=name).first():
-            db.session.add(Material(name=name))
-            print(f"Material angelegt: {name}")
+    existing_materials = {name for (name,) in db.session.query(Material.name).all()}
+    material_rows = [{"name": name} for name in base_materials if name not in existing_materials]
+    if material_rows:
+        db.session.execute(insert(Material), material_rows)
+        for row in material_rows:
+            print(f"Material angelegt: {row['name']}")
 
     base_colors = [
         ("Schwarz", "#000000"),
@@ -2890,10 +3440,16 @@ def init_stammdaten():
         ("Blau", "#0000FF"),
         ("Grau", "#808080"),
     ]
-    for name, hex_code in base_colors:
-        if not Color.query.filter_by(name=name).first():
-            db.session.add(Color(name=name, hex_code=hex_code))
-            print(f"Farbe angelegt: {name} ({hex_code})")
+    existing_colors = {name for (name,) in db.session.query(Color.name).all()}
+    color_rows = [
+        {"name": name, "hex_code": hex_code}
+        for name, hex_code in base_colors
+        if name not in existing_colors
+    ]
+    if color_rows:
+        db.session.execute(insert(Color), color_rows)
+        for row in color_rows:
+            print(f"Farbe angelegt: {row['name']} ({row['hex_code']})")
 
     db.session.commit()
     print("Stammdaten initialisiert.")
@@ -2912,7 +3468,7 @@ def show_version():
 @app.route("/")
 def landing():
     """Einfache Landingpage vor dem Login."""
-    return render_template("landing.html")
+    return conditional_page(page_etag("landing.html"), lambda: render_template("landing.html"))
 
 
 @app.route("/impressum")
@@ -3064,7 +3620,7 @@ def activate_user(token):
         flash(trans("flash_activation_expired"), "warning")
         return redirect(url_for("login"))
 
-    user = User.query.get(activation.user_id)
+    user = db.session.get(User, activation.user_id)
     if not user or user.deleted_at is not None:
         activation.used_at = now
         db.session.commit()
@@ -3101,7 +3657,7 @@ def password_reset_request():
             flash(trans("flash_email_required"), "warning")
             return render_template("password_reset_request.html")
 
-        user = User.query.filter_by(email=email).first()
+        user = User.find_by_email(email)
         sent = False
         if user and user.deleted_at is None and user.is_active:
             sent = send_password_reset_link_for_user(user)
@@ -3145,7 +3701,7 @@ def password_reset_confirm(token):
         flash(trans("flash_password_reset_expired"), "warning")
         return redirect(url_for("password_reset_request"))
 
-    user = User.query.get(reset_token.user_id)
+    user = db.session.get(User, reset_token.user_id)
     if not user or user.deleted_at is not None or not user.is_active:
         reset_token.used_at = now
         db.session.commit()
@@ -3177,6 +3733,10 @@ def password_reset_confirm(token):
     return render_template("password_reset_confirm.html", token=token)
 
 
+# Mindestabstand zwischen zwei last_login_at-Schreibvorgaengen pro User
+LAST_LOGIN_WRITE_INTERVAL = timedelta(minutes=5)
+
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     """Login-Formular & Login-Logik."""
@@ -3233,8 +3793,12 @@ def login():
         email = request.form.get("email", "").strip().lower()
         password = request.form.get("password", "")
 
-        user = User.query.filter_by(email=email).first()
-        if user and user.check_password(password):
+        user = User.find_by_email(email)
+        if user is not None:
+            password_ok = user.check_password(password)
+        else:
+            password_ok = check_dummy_password(password)
+        if password_ok:
             if user.deleted_at is not None:
                 flash(trans("flash_account_deleted"), "danger")
                 return render_template("login.html")
@@ -3257,11 +3821,16 @@ def login():
             timing_marks["settings_ms"] = round((perf_counter() - step_start) * 1000, 1)
 
             session.permanent = True
-            session[SESSION_LAST_ACTIVE_KEY] = datetime.utcnow().isoformat()
-            user.last_login_at = datetime.utcnow()
+            login_at = datetime.utcnow()
+            session[SESSION_LAST_ACTIVE_KEY] = int(unix_time())
 
+            # last_login_at nur grob nachfuehren und ausserhalb des Requests schreiben;
+            # committet wird hier nur noch, wenn check_password den Hash aktualisiert hat
             step_start = perf_counter()
-            db.session.commit()
+            if user.last_login_at is None or login_at - user.last_login_at >= LAST_LOGIN_WRITE_INTERVAL:
+                queue_last_login(app, user.id, login_at)
+            if db.session.is_modified(user):
+                db.session.commit()
             timing_marks["db_commit_ms"] = round((perf_counter() - step_start) * 1000, 1)
             timing_marks["total_ms"] = round((perf_counter() - timing_start) * 1000, 1)
 
@@ -3402,7 +3971,7 @@ def register():
                 ),
                 "danger",
             )
-        elif User.query.filter_by(email=email).first():
+        elif User.email_taken(email):
             write_audit_log(
                 app,
                 "registration_rejected",
@@ -3492,7 +4061,7 @@ def profile():
     """
     Profilseite fuer eingeloggte User, um eigene Stammdaten zu pflegen.
     """
-    user = User.query.get_or_404(current_user.id)
+    user = db.get_or_404(User, current_user.id)
     dashboard_areas = OrderArea.query.order_by(OrderArea.name.asc()).all()
     dashboard_area_ids = {area.id for area in dashboard_areas}
 
@@ -3545,8 +4114,7 @@ def profile():
         if not email:
             flash(trans("flash_email_required"), "danger")
         else:
-            existing = User.query.filter_by(email=email).first()
-            if existing and existing.id != user.id:
+            if email != user.email and User.email_taken(email, exclude_id=user.id):
                 flash(trans("flash_user_email_exists"), "danger")
             elif new_password and new_password != new_password2:
                 flash(trans("flash_passwords_mismatch"), "danger")
@@ -3796,7 +4364,7 @@ def tutorials():
 @login_required
 def tutorial_pdf(video_id):
     ensure_training_playlist_schema()
-    video = TrainingVideo.query.get_or_404(video_id)
+    video = db.get_or_404(TrainingVideo, video_id)
     if not video.pdf_filename:
         abort(404)
 
@@ -3832,7 +4400,7 @@ def new_order():
     ensure_order_category_schema()
     ensure_order_area_schema()
 
-    cost_centers = CostCenter.query.filter_by(is_active=True).order_by(CostCenter.name.asc()).all()
+    cost_centers = get_lookup("cost_centers")
     order_categories = OrderCategory.query.filter_by(active=True).order_by(OrderCategory.name.asc()).all()
     order_areas = OrderArea.query.order_by(OrderArea.name.asc()).all()
     trans = inject_globals().get("t")
@@ -3966,32 +4534,47 @@ def new_order():
             project_url=project_url,
         )
 
-        def _select_id(model, raw_id):
-            if not raw_id:
-                return None
-            try:
-                raw_int = int(raw_id)
-            except ValueError:
-                return None
-            entry = model.query.get(raw_int)
-            return entry.id if entry else None
-
         # Nur sinnvolle IDs setzen
         if cost_center_id:
             try:
                 selected_cost_center_id = int(cost_center_id)
             except ValueError:
                 selected_cost_center_id = None
-            if selected_cost_center_id:
-                selected_cost_center = CostCenter.query.filter_by(
-                    id=selected_cost_center_id,
-                    is_active=True,
-                ).first()
-                if selected_cost_center:
-                    order.cost_center_id = selected_cost_center.id
+            if selected_cost_center_id and lookup_contains("cost_centers", selected_cost_center_id):
+                order.cost_center_id = selected_cost_center_id
 
         db.session.add(order)
-        db.session.commit()
+
+        # Tags speichern
+        if tags_value:
+            db.session.add(OrderTag(order_id=order.id, tags=tags_value))
+
+        # === Datei-Upload (optional) =======================================
+        # Datei zuerst auf die Platte, dann Order + Tags + OrderFile in einem Commit
+        order_file = None
+        file = request.files.get("model_file")
+        if file and file.filename:
+            order_file = save_order_file(
+                order,
+                file,
+                trans,
+                material_id=request.form.get("file_material_id"),
+                color_id=request.form.get("file_color_id"),
+                commit=False,
+            )
+        # ===================================================================
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if order_file is not None:
+                try:
+                    os.unlink(order_folder_path(order.id) / order_file.stored_name)
+                except OSError:
+                    pass
+            raise
+
         write_audit_log(
             app,
             "order_created",
@@ -4006,84 +4589,12 @@ def new_order():
             },
         )
 
-        # Tags speichern
-        if tags_value:
-            db.session.add(OrderTag(order_id=order.id, tags=tags_value))
-            db.session.commit()
-
-        # === Datei-Upload (optional) =======================================
-        file = request.files.get("model_file")
-        if file and file.filename:
-            original_name = file.filename
-            safe_name = secure_filename(original_name)
-
-            # Dateityp/Endung bestimmen (ohne Punkt)
-            _, ext = os.path.splitext(safe_name)
-            ext = ext.lower().lstrip(".")  # "stl" oder "3mf"
-
-            allowed_ext = {"stl", "3mf"}
-            if ext not in allowed_ext:
-                flash(trans("flash_invalid_file"), "warning")
-            else:
-                # OrderFile-Eintrag mit Platzhalter speichern
-                order_file = OrderFile(
-                    order_id=order.id,
-                    original_name=original_name,
-                    stored_name="",
-                    file_type=ext,
-                    material_id=_select_id(Material, request.form.get("file_material_id")),
-                    color_id=_select_id(Color, request.form.get("file_color_id")),
-                )
-                db.session.add(order_file)
-                db.session.flush()  # gibt uns eine ID, ohne zu committen
-
-                # Eindeutigen Dateinamen bauen: <id>_<safe_name>
-                stored_name = f"{order_file.id}_{safe_name}"
-
-                # Unterordner pro Order
-                order_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
-                order_folder.mkdir(parents=True, exist_ok=True)
-
-                full_path = order_folder / stored_name
-                file.save(str(full_path))
-
-                # Metadaten aktualisieren
-                order_file.stored_name = stored_name
-                try:
-                    order_file.filesize = full_path.stat().st_size
-                except OSError:
-                    order_file.filesize = None
-
-                order_file.uploaded_at = datetime.utcnow()
-                update_order_file_preview(order_file, full_path)
-
-                db.session.commit()
-                write_audit_log(
-                    app,
-                    "file_uploaded",
-                    user=current_user,
-                    details={
-                        "order_id": order.id,
-                        "file_kind": "model",
-                        "file_id": order_file.id,
-                        "original_name": order_file.original_name,
-                        "stored_name": order_file.stored_name,
-                        "file_type": order_file.file_type,
-                        "filesize": order_file.filesize,
-                        "material_id": order_file.material_id,
-                        "color_id": order_file.color_id,
-                    },
-                )
-
-                app.logger.debug(
-                    f"[new_order] Uploaded file for order {order.id}: "
-                    f"OrderFile.id={order_file.id}, stored_name={stored_name!r}"
-                )
-        # ===================================================================
+        if order_file is not None:
+            log_order_file_upload(order_file)
 
         app.logger.debug(
-            f"[new_order] Created order id={order.id}, title={order.title!r}, "
-            f"status={order.status!r}, user={current_user.email}"
+            "[new_order] Created order id=%s, title=%r, status=%r, user=%s",
+            order.id, order.title, order.status, current_user.email,
         )
 
         send_admin_order_notification(app, order, status_context["order_status_labels"])
@@ -4106,6 +4617,51 @@ def new_order():
 # Routen: Order-Details (inkl. Chat & Dateien)
 # ============================================================
 
+# Mindestabstand zwischen zwei Lese-Status-Schreibvorgaengen pro User/Order
+READ_STATUS_WRITE_INTERVAL_SECONDS = 30
+# Frueher zusaetzlich in der Session gespeicherter Lese-Zeitpunkt (nur noch zum Aufraeumen)
+LEGACY_LAST_READ_SESSION_PREFIX = "order_last_read_"
+# Optional: Dashboard-Aufruf markiert die angezeigten Auftraege mit neuen Nachrichten
+# als gelesen. Aendert die Bedeutung des "neue Nachricht"-Badges, daher nur per
+# NEOFAB_DASHBOARD_MARKS_READ=1 aktiv.
+DASHBOARD_MARKS_ORDERS_READ = coerce_bool(os.environ.get("NEOFAB_DASHBOARD_MARKS_READ"))
+
+
+def get_order_last_read(order_id: int, user_id: int) -> Optional[datetime]:
+    """Lese-Zeitpunkt eines Users fuer einen Auftrag (Abfrage einmal kompiliert per lambda_stmt)."""
+    stmt = lambda_stmt(
+        lambda: select(OrderReadStatus.last_read_at).where(
+            OrderReadStatus.order_id == order_id,
+            OrderReadStatus.user_id == user_id,
+        )
+    )
+    return db.session.execute(stmt).scalar()
+
+
+def mark_orders_read(order_ids: Iterable[int], user_id: int, read_at: datetime) -> None:
+    """
+    Setzt den Lese-Zeitpunkt eines Users fuer mehrere Auftraege per mehrzeiligem
+    Upsert (ein Statement). Der Aufrufer committet.
+    """
+    rows = [
+        {"order_id": order_id, "user_id": user_id, "last_read_at": read_at}
+        for order_id in order_ids
+    ]
+    if not rows:
+        return
+    stmt = sqlite_insert(OrderReadStatus).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OrderReadStatus.order_id, OrderReadStatus.user_id],
+        set_={"last_read_at": stmt.excluded.last_read_at},
+    )
+    db.session.execute(stmt)
+
+
+def mark_order_read(order_id: int, user_id: int, read_at: datetime) -> None:
+    """Setzt den Lese-Zeitpunkt eines Users fuer einen Auftrag. Der Aufrufer committet."""
+    mark_orders_read((order_id,), user_id, read_at)
+
+
 @app.route("/orders/<int:order_id>", methods=["GET", "POST"])
 @login_required
 def order_detail(order_id):
@@ -4116,11 +4672,14 @@ def order_detail(order_id):
     - Nachrichten schreiben
     - Dateien hochladen / l├Âschen
     """
-    order = Order.query.get_or_404(order_id)
-
-    # Access control: normale User sehen nur eigene Auftr├ñge
-    if not can_view_order(order, current_user):
-        abort(403)
+    # Dateien samt Material/Farbe gleich mitladen (sonst je Datei ein SELECT)
+    order = load_order_or_404(
+        order_id,
+        options=[
+            selectinload(Order.files).selectinload(OrderFile.material),
+            selectinload(Order.files).selectinload(OrderFile.color),
+        ],
+    )
 
     visible_tabs = get_visible_order_tabs(order, current_user)
     valid_tabs = set(visible_tabs)
@@ -4134,7 +4693,7 @@ def order_detail(order_id):
         return redirect(url_for("order_detail", order_id=order.id))
 
     if request.method == "POST":
-        app.logger.debug(f"[order_detail] POST data for order {order.id}: {dict(request.form)}")
+        app.logger.debug("[order_detail] POST data for order %s: %s", order.id, request.form)
         trans = inject_globals().get("t")
 
         action = request.form.get("action")
@@ -4163,10 +4722,10 @@ def order_detail(order_id):
             tags_value = request.form.get("tags", "").strip() or None
 
             app.logger.debug(
-                f"[order_detail] UPDATE_ORDER before: id={order.id}, "
-                f"title={order.title!r}, status={order.status!r}"
+                "[order_detail] UPDATE_ORDER before: id=%s, title=%r, status=%r",
+                order.id, order.title, order.status,
             )
-            app.logger.debug(f"[order_detail] Form status value: {status!r}")
+            app.logger.debug("[order_detail] Form status value: %r", status)
 
             if not title:
                 flash(trans("flash_title_required"), "danger")
@@ -4195,14 +4754,11 @@ def order_detail(order_id):
                         selected_cost_center_id = int(cost_center_id)
                     except ValueError:
                         selected_cost_center_id = None
-                    selected_cost_center = (
-                        CostCenter.query
-                        .filter_by(id=selected_cost_center_id, is_active=True)
-                        .first()
-                        if selected_cost_center_id
+                    order.cost_center_id = (
+                        selected_cost_center_id
+                        if selected_cost_center_id and lookup_contains("cost_centers", selected_cost_center_id)
                         else None
                     )
-                    order.cost_center_id = selected_cost_center.id if selected_cost_center else None
                 else:
                     order.cost_center_id = None
 
@@ -4262,18 +4818,17 @@ def order_detail(order_id):
 
                 # Statuswechsel nur f├╝r Admin
                 if current_user.role == "admin":
-                    valid_status_values = ORDER_STATUS_VALUES
-                    app.logger.debug(f"[order_detail] Valid status values: {valid_status_values}")
-                    if status in valid_status_values:
+                    app.logger.debug("[order_detail] Valid status values: %s", ORDER_STATUS_VALUES)
+                    if status in VALID_STATUS:
                         order.status = status
-                        app.logger.debug(f"[order_detail] Status changed to: {order.status!r}")
+                        app.logger.debug("[order_detail] Status changed to: %r", order.status)
                     else:
                         app.logger.debug("[order_detail] Ignored invalid status from form.")
 
                 db.session.commit()
                 app.logger.debug(
-                    f"[order_detail] UPDATE_ORDER after commit: id={order.id}, "
-                    f"title={order.title!r}, status={order.status!r}"
+                    "[order_detail] UPDATE_ORDER after commit: id=%s, title=%r, status=%r",
+                    order.id, order.title, order.status,
                 )
 
                 if previous_status != order.status:
@@ -4285,7 +4840,7 @@ def order_detail(order_id):
         # --- 2) Neue Nachricht hinzuf├╝gen ----------------------------------
         elif action == "add_message":
             content = request.form.get("content", "").strip()
-            app.logger.debug(f"[order_detail] ADD_MESSAGE for order {order.id}: {content!r}")
+            app.logger.debug("[order_detail] ADD_MESSAGE for order %s: %r", order.id, content)
 
             if not content:
                 flash(trans("flash_enter_message"), "danger")
@@ -4297,15 +4852,15 @@ def order_detail(order_id):
                 )
                 db.session.add(msg)
                 db.session.commit()
-                app.logger.debug(f"[order_detail] Message {msg.id} added to order {order.id}")
+                app.logger.debug("[order_detail] Message %s added to order %s", msg.id, order.id)
                 flash(trans("flash_message_added"), "success")
                 return redirect(url_for("order_detail", order_id=order.id))
 
         # --- 3) Auftrag stornieren -----------------------------------------
         elif action == "cancel_order":
             app.logger.debug(
-                f"[order_detail] CANCEL_ORDER requested by user={current_user.email}, "
-                f"order_id={order.id}, current_status={order.status!r}"
+                "[order_detail] CANCEL_ORDER requested by user=%s, order_id=%s, current_status=%r",
+                current_user.email, order.id, order.status,
             )
             previous_status = order.status
             # User darf nur eigene Auftr├ñge stornieren, Admin alle
@@ -4314,7 +4869,8 @@ def order_detail(order_id):
                     order.status = "cancelled"
                     db.session.commit()
                     app.logger.debug(
-                        f"[order_detail] Order {order.id} cancelled. New status={order.status!r}"
+                        "[order_detail] Order %s cancelled. New status=%r",
+                        order.id, order.status,
                     )
                     status_labels = get_status_context(trans).get("order_status_labels", {})
                     send_order_status_change_notification(
@@ -4327,13 +4883,14 @@ def order_detail(order_id):
                     flash(trans("flash_order_cancelled"), "info")
                 else:
                     app.logger.debug(
-                        f"[order_detail] Order {order.id} cannot be cancelled (status={order.status!r})"
+                        "[order_detail] Order %s cannot be cancelled (status=%r)",
+                        order.id, order.status,
                     )
                     flash(trans("flash_order_cannot_cancel"), "warning")
             else:
                 app.logger.debug(
-                    f"[order_detail] CANCEL_ORDER forbidden for user={current_user.email}, "
-                    f"order_id={order.id}"
+                    "[order_detail] CANCEL_ORDER forbidden for user=%s, order_id=%s",
+                    current_user.email, order.id,
                 )
 
             return redirect(url_for("order_detail", order_id=order.id))
@@ -4354,84 +4911,17 @@ def order_detail(order_id):
                 flash(trans("flash_select_file"), "warning")
                 return order_detail_redirect("files")
 
-            original_name = file.filename
-            safe_name = secure_filename(original_name)
-
-            _, ext = os.path.splitext(safe_name)
-            ext = ext.lower().lstrip(".")  # "stl" oder "3mf"
-
-            allowed_ext = {"stl", "3mf"}
-            if ext not in allowed_ext:
-                flash(trans("flash_invalid_file"), "warning")
-                return order_detail_redirect("files")
-
-            # OrderFile-Eintrag mit Platzhalter
-            order_file = OrderFile(
-                order_id=order.id,
-                original_name=original_name,
-                stored_name="",
-                file_type=ext,
+            order_file = save_order_file(
+                order,
+                file,
+                trans,
+                material_id=file_material_id,
+                color_id=file_color_id,
                 note=file_note,
                 quantity=file_quantity,
             )
-            if file_material_id:
-                try:
-                    material_id_int = int(file_material_id)
-                    if Material.query.get(material_id_int):
-                        order_file.material_id = material_id_int
-                except ValueError:
-                    pass
-            if file_color_id:
-                try:
-                    color_id_int = int(file_color_id)
-                    if Color.query.get(color_id_int):
-                        order_file.color_id = color_id_int
-                except ValueError:
-                    pass
-            db.session.add(order_file)
-            db.session.flush()  # gibt eine ID ohne Commit
-
-            # eindeutiger Dateiname
-            stored_name = f"{order_file.id}_{safe_name}"
-
-            order_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
-            order_folder.mkdir(parents=True, exist_ok=True)
-
-            full_path = order_folder / stored_name
-            file.save(str(full_path))
-
-            try:
-                order_file.filesize = full_path.stat().st_size
-            except OSError:
-                order_file.filesize = None
-
-            order_file.stored_name = stored_name
-            order_file.uploaded_at = datetime.utcnow()
-            update_order_file_preview(order_file, full_path)
-
-            db.session.commit()
-            write_audit_log(
-                app,
-                "file_uploaded",
-                user=current_user,
-                details={
-                    "order_id": order.id,
-                    "file_kind": "model",
-                    "file_id": order_file.id,
-                    "original_name": order_file.original_name,
-                    "stored_name": order_file.stored_name,
-                    "file_type": order_file.file_type,
-                    "filesize": order_file.filesize,
-                    "quantity": order_file.quantity,
-                    "material_id": order_file.material_id,
-                    "color_id": order_file.color_id,
-                },
-            )
-
-            app.logger.debug(
-                f"[order_detail] Uploaded extra file for order {order.id}: "
-                f"OrderFile.id={order_file.id}, stored_name={stored_name!r}"
-            )
+            if order_file is None:
+                return order_detail_redirect("files")
 
             flash(trans("flash_file_uploaded"), "success")
             return order_detail_redirect("files")
@@ -4472,7 +4962,7 @@ def order_detail(order_id):
             if file_material_id:
                 try:
                     material_id_int = int(file_material_id)
-                    if Material.query.get(material_id_int):
+                    if lookup_contains("materials", material_id_int):
                         order_file.material_id = material_id_int
                 except ValueError:
                     pass
@@ -4480,7 +4970,7 @@ def order_detail(order_id):
             if file_color_id:
                 try:
                     color_id_int = int(file_color_id)
-                    if Color.query.get(color_id_int):
+                    if lookup_contains("colors", color_id_int):
                         order_file.color_id = color_id_int
                 except ValueError:
                     pass
@@ -4866,7 +5356,7 @@ def order_detail(order_id):
                 except ValueError:
                     selected_plotter_type_id = None
                 if selected_plotter_type_id:
-                    selected_plotter_type = PlotterType.query.get(selected_plotter_type_id)
+                    selected_plotter_type = db.session.get(PlotterType, selected_plotter_type_id)
                     if selected_plotter_type and (
                         selected_plotter_type.active or selected_plotter_type.id == poster_file.plotter_type_id
                     ):
@@ -4879,13 +5369,13 @@ def order_detail(order_id):
                 except ValueError:
                     selected_plotter_paper_id = None
                 if selected_plotter_paper_id:
-                    selected_plotter_paper = PlotterPaper.query.get(selected_plotter_paper_id)
+                    selected_plotter_paper = db.session.get(PlotterPaper, selected_plotter_paper_id)
                     if selected_plotter_paper and (
                         selected_plotter_paper.active or selected_plotter_paper.id == poster_file.plotter_paper_id
                     ):
                         plotter_paper_id = selected_plotter_paper.id
             if not plotter_paper_id and selected_plotter_type and selected_plotter_type.default_paper_id:
-                default_paper = PlotterPaper.query.get(selected_plotter_type.default_paper_id)
+                default_paper = db.session.get(PlotterPaper, selected_plotter_type.default_paper_id)
                 if default_paper and (default_paper.active or default_paper.id == poster_file.plotter_paper_id):
                     plotter_paper_id = default_paper.id
                     selected_plotter_paper = default_paper
@@ -5409,8 +5899,7 @@ def order_detail(order_id):
             except ValueError:
                 quantity = 1
 
-            valid_statuses = set(PRINT_JOB_STATUS_VALUES)
-            status = status_raw if status_raw in valid_statuses else "upload"
+            status = status_raw if status_raw in VALID_PRINT_JOB_STATUS else "upload"
             if status == "started":
                 started_at = current_print_start_time()
 
@@ -5588,8 +6077,7 @@ def order_detail(order_id):
             except ValueError:
                 quantity = 1
 
-            valid_statuses = set(PRINT_JOB_STATUS_VALUES)
-            status = status_raw if status_raw in valid_statuses else (job.status or "upload")
+            status = status_raw if status_raw in VALID_PRINT_JOB_STATUS else (job.status or "upload")
             previous_status = job.status
             if status == "started" and previous_status != "started":
                 started_at = current_print_start_time()
@@ -5664,9 +6152,7 @@ def order_detail(order_id):
                 try:
                     full_path.unlink()
                 except OSError:
-                    app.logger.warning(
-                        f"[order_detail] Could not delete gcode file on disk: {full_path}"
-                    )
+                    app.logger.warning("[order_detail] Could not delete gcode file on disk: %s", full_path)
 
             db.session.delete(job)
             db.session.flush()
@@ -5687,55 +6173,12 @@ def order_detail(order_id):
                 flash(trans("flash_invalid_file_id"), "danger")
                 return redirect(url_for("order_detail", order_id=order.id))
 
-            order_file = OrderFile.query.filter_by(
-                id=file_id,
-                order_id=order.id
-            ).first()
-
-            if not order_file:
+            if not delete_order_files(order.id, [file_id]):
                 flash(trans("flash_file_not_found"), "warning")
                 return redirect(url_for("order_detail", order_id=order.id))
-
-            # Physische Datei l├Âschen
-            order_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
-            full_path = order_folder / order_file.stored_name
-
-            if full_path.exists():
-                try:
-                    full_path.unlink()
-                except OSError:
-                    app.logger.warning(
-                        f"[order_detail] Could not delete file on disk: {full_path}"
-                    )
-
-            thumb_folder = order_folder / "thumbnails"
-            thumb_names = set()
-            if order_file.thumb_sm_path:
-                thumb_names.add(order_file.thumb_sm_path)
-            if order_file.thumb_lg_path:
-                thumb_names.add(order_file.thumb_lg_path)
-            if order_file.file_type and order_file.file_type.lower() == "stl":
-                default_sm, default_lg = _build_model_thumbnail_names(order_file.stored_name)
-                thumb_names.add(default_sm)
-                thumb_names.add(default_lg)
-
-            for name in thumb_names:
-                thumb_path = thumb_folder / name
-                if thumb_path.exists():
-                    try:
-                        thumb_path.unlink()
-                    except OSError:
-                        app.logger.warning(
-                            f"[order_detail] Could not delete thumbnail on disk: {thumb_path}"
-                        )
-
-            # DB-Eintrag l├Âschen
-            db.session.delete(order_file)
             db.session.commit()
 
-            app.logger.debug(
-                f"[order_detail] Deleted file {file_id} for order {order.id}"
-            )
+            app.logger.debug("[order_detail] Deleted file %s for order %s", file_id, order.id)
 
             flash(trans("flash_file_deleted"), "info")
             return redirect(url_for("order_detail", order_id=order.id))
@@ -5767,14 +6210,14 @@ def order_detail(order_id):
                 try:
                     full_path.unlink()
                 except OSError:
-                    app.logger.warning(f"[order_detail] Could not delete image on disk: {full_path}")
+                    app.logger.warning("[order_detail] Could not delete image on disk: %s", full_path)
 
             thumb_path = image_folder / "thumbnails" / image_entry.stored_name
             if thumb_path.exists():
                 try:
                     thumb_path.unlink()
                 except OSError:
-                    app.logger.warning(f"[order_detail] Could not delete thumbnail on disk: {thumb_path}")
+                    app.logger.warning("[order_detail] Could not delete thumbnail on disk: %s", thumb_path)
 
             db.session.delete(image_entry)
             db.session.commit()
@@ -5811,56 +6254,36 @@ def order_detail(order_id):
             return order_detail_redirect("files")
 
     # --- Ungelesene Nachrichten vor Read-Update pruefen ---------------------
-    read_status = OrderReadStatus.query.filter_by(
-        order_id=order.id,
-        user_id=current_user.id,
-    ).first()
-
-    previous_last_read = read_status.last_read_at if read_status else None
-    latest_message_at = (
-        db.session.query(func.max(OrderMessage.created_at))
-        .filter(OrderMessage.order_id == order.id)
-        .scalar()
-    )
+    previous_last_read = get_order_last_read(order.id, current_user.id)
+    latest_message_at = order.last_message_at
     expand_chat_panel = bool(
         latest_message_at and (previous_last_read is None or latest_message_at > previous_last_read)
     )
 
-    # --- Lese-Status aktualisieren (GET + nach POST-Redirect) --------------
+    # --- Lese-Status aktualisieren (nur GET, also auch nach POST-Redirect) --
+    # Schnelles Neuladen ohne neue Nachrichten schreibt nicht erneut; ein POST, der
+    # ohne Redirect hier ankommt (Validierungsfehler), schreibt gar nicht.
     now = datetime.utcnow()
-
-    if read_status is None:
-        read_status = OrderReadStatus(
-            order_id=order.id,
-            user_id=current_user.id,
-            last_read_at=now,
-        )
-        db.session.add(read_status)
-        app.logger.debug(
-            f"[order_detail] Created new read status for order={order.id}, user={current_user.email}"
-        )
-    else:
-        read_status.last_read_at = now
-        app.logger.debug(
-            f"[order_detail] Updated read status for order={order.id}, user={current_user.email}"
-        )
-
-    db.session.commit()
-
-    # Zus├ñtzlich in Session merken (pro User, pro Order)
-    session_key = f"order_last_read_{order.id}"
-    session[session_key] = now.isoformat()
-    app.logger.debug(
-        f"[order_detail] Session last_read set for order={order.id}, key={session_key}, value={session[session_key]}"
+    read_status_fresh = (
+        previous_last_read is not None
+        and not expand_chat_panel
+        and (now - previous_last_read).total_seconds() < READ_STATUS_WRITE_INTERVAL_SECONDS
     )
+    write_read_status = request.method == "GET" and not read_status_fresh
+    # Geschrieben wird erst nach dem Rendern: der Commit wuerde sonst Order und
+    # current_user verfallen lassen und beide fuer das Template neu laden.
+
+    # Lese-Status liegt nur noch in order_read_status; alte Session-Kopien
+    # (order_last_read_<id>) aus dem Cookie entfernen, damit es nicht weiter waechst
+    stale_read_keys = [key for key in session if key.startswith(LEGACY_LAST_READ_SESSION_PREFIX)]
+    for key in stale_read_keys:
+        session.pop(key, None)
 
-    messages = order.messages
+    messages = load_order_messages(order.id)
 
     # Stammdaten f├╝r Auswahlfelder laden
-    materials = Material.query.order_by(Material.name.asc()).all()
-    colors = Color.query.order_by(Color.name.asc()).all()
+    materials, colors, cost_centers = get_lookups()
     order_areas = OrderArea.query.order_by(OrderArea.name.asc()).all()
-    cost_centers = CostCenter.query.filter_by(is_active=True).order_by(CostCenter.name.asc()).all()
     printer_profiles = PrinterProfile.query.filter_by(active=True).order_by(PrinterProfile.name.asc()).all()
     filament_materials = FilamentMaterial.query.filter_by(active=True).order_by(FilamentMaterial.name.asc()).all()
     plotter_types = PlotterType.query.filter_by(active=True).order_by(PlotterType.name.asc()).all()
@@ -5869,7 +6292,7 @@ def order_detail(order_id):
     if order.printer_profile_id and not any(
         profile.id == order.printer_profile_id for profile in printer_profiles
     ):
-        selected_profile = PrinterProfile.query.get(order.printer_profile_id)
+        selected_profile = db.session.get(PrinterProfile, order.printer_profile_id)
         if selected_profile:
             printer_profiles.append(selected_profile)
             printer_profiles.sort(key=lambda profile: (profile.name or "").lower())
@@ -5877,7 +6300,7 @@ def order_detail(order_id):
     if order.filament_material_id and not any(
         material.id == order.filament_material_id for material in filament_materials
     ):
-        selected_material = FilamentMaterial.query.get(order.filament_material_id)
+        selected_material = db.session.get(FilamentMaterial, order.filament_material_id)
         if selected_material:
             filament_materials.append(selected_material)
             filament_materials.sort(key=lambda material: (material.name or "").lower())
@@ -5898,14 +6321,14 @@ def order_detail(order_id):
     }
     for profile_id in selected_printer_profile_ids:
         if not any(profile.id == profile_id for profile in printer_profiles):
-            selected_profile = PrinterProfile.query.get(profile_id)
+            selected_profile = db.session.get(PrinterProfile, profile_id)
             if selected_profile:
                 printer_profiles.append(selected_profile)
     printer_profiles.sort(key=lambda profile: (profile.name or "").lower())
 
     for material_id in selected_filament_material_ids:
         if not any(material.id == material_id for material in filament_materials):
-            selected_material = FilamentMaterial.query.get(material_id)
+            selected_material = db.session.get(FilamentMaterial, material_id)
             if selected_material:
                 filament_materials.append(selected_material)
     filament_materials.sort(key=lambda material: (material.name or "").lower())
@@ -5937,13 +6360,13 @@ def order_detail(order_id):
             if poster.plotter_type_id and not any(
                 plotter_type.id == poster.plotter_type_id for plotter_type in plotter_types
             ):
-                selected_plotter_type = PlotterType.query.get(poster.plotter_type_id)
+                selected_plotter_type = db.session.get(PlotterType, poster.plotter_type_id)
                 if selected_plotter_type:
                     plotter_types.append(selected_plotter_type)
             if poster.plotter_paper_id and not any(
                 paper.id == poster.plotter_paper_id for paper in plotter_papers
             ):
-                selected_paper = PlotterPaper.query.get(poster.plotter_paper_id)
+                selected_paper = db.session.get(PlotterPaper, poster.plotter_paper_id)
                 if selected_paper:
                     plotter_papers.append(selected_paper)
         if poster_thumbnail_changed or poster_coverage_changed:
@@ -5987,11 +6410,12 @@ def order_detail(order_id):
     )
 
     status_context = get_status_context(inject_globals().get("t"))
-    app.logger.debug(
-        f"[order_detail] Render detail for order {order.id}: status={order.status!r}, "
-        f"messages_count={len(messages)}, files_count={len(order.files)}"
-    )
-    return render_template(
+    if app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug(
+            "[order_detail] Render detail for order %s: status=%r, messages_count=%s, files_count=%s",
+            order.id, order.status, len(messages), len(order.files),
+        )
+    html = render_template(
         "order_detail.html",
         order=order,
         messages=messages,
@@ -6021,6 +6445,24 @@ def order_detail(order_id):
         visible_tabs=visible_tabs,
         expand_chat_panel=expand_chat_panel,
     )
+    if write_read_status:
+        order_id_value, user_id_value = order.id, current_user.id
+        try:
+            mark_order_read(order_id_value, user_id_value, now)
+            db.session.commit()
+        except Exception:
+            # Seite trotzdem ausliefern; der Lese-Status folgt beim naechsten Aufruf
+            db.session.rollback()
+            app.logger.exception(
+                "[order_detail] Failed to upsert read status for order=%s, user=%s",
+                order_id_value, user_id_value,
+            )
+        else:
+            app.logger.debug(
+                "[order_detail] Upserted read status for order=%s, user=%s",
+                order_id_value, user_id_value,
+            )
+    return html
 
 
 @app.route("/orders/<int:order_id>/messages-fragment")
@@ -6029,22 +6471,32 @@ def order_messages_fragment(order_id):
     """
     Liefert nur den Nachrichten-Thread als HTML-Fragment fÃ¼r Auto-Refresh.
     """
-    order = Order.query.get_or_404(order_id)
+    order = load_order_or_404(order_id)
 
-    # Access control wie in order_detail
-    if not can_view_order(order, current_user):
-        abort(403)
+    # Conditional GET: Nachrichten werden nur angehaengt, nie bearbeitet,
+    # daher genuegen hoechste ID + Anzahl (+ Sprache) als ETag.
+    last_message_id, message_count = (
+        db.session.query(func.max(OrderMessage.id), func.count(OrderMessage.id))
+        .filter(OrderMessage.order_id == order.id)
+        .one()
+    )
+    etag = f"msg-{last_message_id or 0}-{message_count}-{getattr(current_user, 'language', None) or ''}"
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+        return response
 
-    messages = order.messages
-    return render_template("order_messages_fragment.html", messages=messages)
+    messages = load_order_messages(order.id)
+    response = make_response(render_template("order_messages_fragment.html", messages=messages))
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 @app.route("/orders/<int:order_id>/images/<int:image_id>/thumbnail")
 @login_required
 def order_image_thumbnail(order_id, image_id):
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     image_entry = OrderImage.query.filter_by(id=image_id, order_id=order.id).first_or_404()
 
@@ -6074,9 +6526,7 @@ def order_image_thumbnail(order_id, image_id):
 @app.route("/orders/<int:order_id>/images/<int:image_id>/view")
 @login_required
 def order_image_view(order_id, image_id):
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     image_entry = OrderImage.query.filter_by(id=image_id, order_id=order.id).first_or_404()
 
@@ -6096,17 +6546,15 @@ def order_image_view(order_id, image_id):
 @app.route("/orders/<int:order_id>/files/<int:file_id>/thumbnail/<size>", methods=["GET", "POST"])
 @login_required
 def order_file_thumbnail(order_id, file_id, size):
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     order_file = OrderFile.query.filter_by(id=file_id, order_id=order.id).first_or_404()
-    if (order_file.file_type or "").lower() not in {"stl", "3mf"}:
+    if (order_file.file_type or "").lower() not in ALLOWED_MODEL_EXT:
         abort(404)
     if size not in {"sm", "lg"}:
         abort(404)
 
-    order_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
+    order_folder = order_folder_path(order.id)
     thumb_folder = order_folder / "thumbnails"
     thumb_sm_name, thumb_lg_name = _build_model_thumbnail_names(order_file.stored_name)
     thumb_name = order_file.thumb_sm_path or thumb_sm_name
@@ -6165,12 +6613,10 @@ def order_file_thumbnail(order_id, file_id, size):
 @app.route("/orders/<int:order_id>/files/<int:file_id>/preview")
 @login_required
 def order_file_preview(order_id, file_id):
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     order_file = OrderFile.query.filter_by(id=file_id, order_id=order.id).first_or_404()
-    order_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
+    order_folder = order_folder_path(order.id)
     full_path = order_folder / order_file.stored_name
 
     if not full_path.exists():
@@ -6197,9 +6643,7 @@ def order_file_preview(order_id, file_id):
 @login_required
 def download_order_image(order_id, image_id):
     trans = inject_globals().get("t")
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     image_entry = OrderImage.query.filter_by(id=image_id, order_id=order.id).first_or_404()
 
@@ -6221,9 +6665,7 @@ def download_order_image(order_id, image_id):
 @app.route("/orders/<int:order_id>/videos/<int:video_id>/view")
 @login_required
 def order_video_view(order_id, video_id):
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     video_entry = OrderVideo.query.filter_by(id=video_id, order_id=order.id).first_or_404()
     video_folder = Path(app.config["VIDEO_UPLOAD_FOLDER"]) / f"order_{order.id}"
@@ -6245,9 +6687,7 @@ def order_video_view(order_id, video_id):
 @login_required
 def download_order_video(order_id, video_id):
     trans = inject_globals().get("t")
-    order = Order.query.get_or_404(order_id)
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     video_entry = OrderVideo.query.filter_by(id=video_id, order_id=order.id).first_or_404()
     video_folder = Path(app.config["VIDEO_UPLOAD_FOLDER"]) / f"order_{order.id}"
@@ -6267,6 +6707,25 @@ def download_order_video(order_id, video_id):
 # Datei-Download
 # ============================================================
 
+def x_accel_attachment(internal_path: str, download_name: str):
+    """
+    Leere Antwort mit X-Accel-Redirect: nginx liefert die Datei selbst aus
+    (sendfile, Range, Caching), Python ist sofort wieder frei.
+    """
+    response = app.response_class()
+    response.headers["X-Accel-Redirect"] = internal_path
+    response.mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+    try:
+        download_name.encode("ascii")
+    except UnicodeEncodeError:
+        ascii_name = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": ascii_name, "filename*": f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+    else:
+        names = {"filename": download_name}
+    response.headers.set("Content-Disposition", "attachment", **names)
+    return response
+
+
 @app.route("/orders/<int:order_id>/files/<int:file_id>/download")
 @login_required
 def download_order_file(order_id, file_id):
@@ -6275,11 +6734,7 @@ def download_order_file(order_id, file_id):
     """
     trans = inject_globals().get("t")
     # Auftrag laden
-    order = Order.query.get_or_404(order_id)
-
-    # Access control wie in order_detail
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
 
     # Datei suchen
     order_file = OrderFile.query.filter_by(
@@ -6288,19 +6743,25 @@ def download_order_file(order_id, file_id):
     ).first_or_404()
 
     # Pfad zusammensetzen
-    order_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
+    order_folder = order_folder_path(order.id)
     full_path = order_folder / order_file.stored_name
 
     if not full_path.exists():
         flash(trans("flash_file_missing_server"), "danger")
         return redirect(url_for("order_detail", order_id=order.id))
 
-    # Download ausliefern
+    # Download ausliefern (nginx uebernimmt per X-Accel-Redirect, falls konfiguriert)
+    if X_ACCEL_UPLOAD_PREFIX:
+        return x_accel_attachment(
+            f"{X_ACCEL_UPLOAD_PREFIX}/order_{order.id}/{quote(order_file.stored_name)}",
+            order_file.original_name or order_file.stored_name,
+        )
     return send_from_directory(
         directory=str(order_folder),
         path=order_file.stored_name,
         as_attachment=True,
         download_name=order_file.original_name,  # Name, den der User sieht
+        conditional=True,
     )
 
 
@@ -6308,10 +6769,7 @@ def download_order_file(order_id, file_id):
 @login_required
 def download_print_job(order_id, job_id):
     trans = inject_globals().get("t")
-    order = Order.query.get_or_404(order_id)
-
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
     if not is_3d_print_order(order):
         abort(404)
 
@@ -6339,10 +6797,7 @@ def download_print_job(order_id, job_id):
 @login_required
 def download_poster_file(order_id, poster_id):
     trans = inject_globals().get("t")
-    order = Order.query.get_or_404(order_id)
-
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
     if not is_plotter_order(order):
         abort(404)
 
@@ -6370,10 +6825,7 @@ def download_poster_file(order_id, poster_id):
 @login_required
 def download_procurement_article_note_file(order_id, article_id):
     trans = inject_globals().get("t")
-    order = Order.query.get_or_404(order_id)
-
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
     if not is_procurement_order(order):
         abort(404)
 
@@ -6404,10 +6856,7 @@ def download_procurement_article_note_file(order_id, article_id):
 @app.route("/orders/<int:order_id>/posters/<int:poster_id>/thumbnail")
 @login_required
 def poster_file_thumbnail(order_id, poster_id):
-    order = Order.query.get_or_404(order_id)
-
-    if not can_view_order(order, current_user):
-        abort(403)
+    order = load_order_or_404(order_id)
     if not is_plotter_order(order):
         abort(404)
 
@@ -6435,11 +6884,8 @@ def poster_file_thumbnail(order_id, poster_id):
 @app.route("/files/<int:file_id>/set-color", methods=["POST"])
 @login_required
 def set_file_color(file_id):
-    order_file = OrderFile.query.get_or_404(file_id)
-    order = Order.query.get_or_404(order_file.order_id)
-
-    if not can_view_order(order, current_user):
-        abort(403)
+    order_file = db.get_or_404(OrderFile, file_id)
+    load_order_or_404(order_file.order_id)
 
     payload = request.get_json(silent=True) or request.form
     color_id_raw = payload.get("color_id") if payload else None
@@ -6452,8 +6898,7 @@ def set_file_color(file_id):
         except (TypeError, ValueError):
             return jsonify({"ok": False, "error": "invalid_color_id"}), 400
 
-        color = Color.query.get(color_id)
-        if not color:
+        if not lookup_contains("colors", color_id):
             return jsonify({"ok": False, "error": "color_not_found"}), 404
         order_file.color_id = color_id
 
@@ -6475,9 +6920,7 @@ def dashboard():
     - "new message"-Badge
     - Anzahl Dateien ("Files") pro Auftrag
     """
-    app.logger.debug(
-        f"[dashboard] user={current_user.email}, role={current_user.role}"
-    )
+    app.logger.debug("[dashboard] user=%s, role=%s", current_user.email, current_user.role)
     trans = inject_globals().get("t")
     status_context = get_status_context(trans)
     sort_by = (request.args.get("sort") or "created").strip().lower()
@@ -6638,15 +7081,9 @@ def dashboard():
             flash(trans("flash_announcement_archived"), "info")
             return redirect(url_for("dashboard"))
 
-    # 1) Orders laden (je nach Rolle)
-    if current_user.role == "admin":
-        orders = (
-            Order.query
-            .filter(Order.is_archived.is_(False))
-            .order_by(Order.created_at.desc())
-            .all()
-        )
-    else:
+    # 1) Orders-Query aufbauen (je nach Rolle); Filter, Sortierung und Seite laufen in SQL
+    order_query = Order.query.filter(Order.is_archived.is_(False))
+    if current_user.role != "admin":
         managed_category_ids = {
             permission.category_id
             for permission in UserOrderCategoryPermission.query.filter_by(
@@ -6658,17 +7095,11 @@ def dashboard():
             if current_user.role in category.worker_roles():
                 managed_category_ids.add(category.id)
 
-        orders = (
-            Order.query
-            .filter(
-                or_(
-                    Order.user_id == current_user.id,
-                    Order.category_id.in_(managed_category_ids) if managed_category_ids else False,
-                )
+        order_query = order_query.filter(
+            or_(
+                Order.user_id == current_user.id,
+                Order.category_id.in_(managed_category_ids) if managed_category_ids else False,
             )
-            .filter(Order.is_archived.is_(False))
-            .order_by(Order.created_at.desc())
-            .all()
         )
 
     if current_user.role in {"admin", "worker"}:
@@ -6677,9 +7108,25 @@ def dashboard():
             for pref in UserOrderAreaPreference.query.filter_by(user_id=current_user.id).all()
         }
         if visible_area_ids:
-            orders = [order for order in orders if order.area_id in visible_area_ids]
-
-    app.logger.debug(f"[dashboard] Loaded {len(orders)} orders")
+            order_query = order_query.filter(Order.area_id.in_(visible_area_ids))
+
+    # Filter-Auswahl nur aus (Kategorie, Bereich, Status)-Kombinationen bauen statt aus allen Orders
+    filter_rows = order_query.with_entities(Order.category_id, Order.area_id, Order.status).distinct().all()
+    app.logger.debug("[dashboard] Loaded %s filter combinations", len(filter_rows))
+
+    default_category = OrderCategory.query.filter_by(key="3d_print").first()
+    row_category_ids = {row.category_id for row in filter_rows if row.category_id is not None}
+    categories_by_id = (
+        {category.id: category for category in OrderCategory.query.filter(OrderCategory.id.in_(row_category_ids))}
+        if row_category_ids
+        else {}
+    )
+    row_area_ids = {row.area_id for row in filter_rows if row.area_id is not None}
+    areas_by_id = (
+        {area.id: area for area in OrderArea.query.filter(OrderArea.id.in_(row_area_ids))}
+        if row_area_ids
+        else {}
+    )
 
     category_filters_map = {}
     area_filters_map = {}
@@ -6689,14 +7136,15 @@ def dashboard():
         if key
     }
     status_filter_values = set(configured_status_keys)
-    for order in orders:
-        category = get_order_category(order)
+    for row in filter_rows:
+        category = categories_by_id.get(row.category_id) or default_category
         if category and category.id is not None:
             category_filters_map[category.id] = category.name
-        if order.area and order.area.id is not None:
-            area_filters_map[order.area.id] = order.area.name
-        if order.status:
-            status_filter_values.add(order.status)
+        area = areas_by_id.get(row.area_id)
+        if area:
+            area_filters_map[area.id] = area.name
+        if row.status:
+            status_filter_values.add(row.status)
 
     category_filters = [
         {"id": category_id, "name": category_name}
@@ -6750,12 +7198,40 @@ def dashboard():
         session.pop(dashboard_filter_session_keys["status"], None)
 
     if selected_category_id is not None:
-        orders = [order for order in orders if order.category_id == selected_category_id]
+        order_query = order_query.filter(Order.category_id == selected_category_id)
     if selected_area_id is not None:
-        orders = [order for order in orders if order.area_id == selected_area_id]
+        order_query = order_query.filter(Order.area_id == selected_area_id)
     if selected_status:
-        orders = [order for order in orders if (order.status or "") == selected_status]
+        order_query = order_query.filter(Order.status == selected_status)
+
+    # Beziehungen, die Sortierung und Tabelle pro Zeile nutzen, gesammelt vorladen
+    # Nur die Spalten laden, die Tabelle/Sortierung brauchen (keine Text-Felder);
+    # die Beschreibung nur fuer die Suche
+    dashboard_order_columns = [
+        Order.id,
+        Order.title,
+        Order.status,
+        Order.created_at,
+        Order.user_id,
+        Order.category_id,
+        Order.area_id,
+    ]
     if dashboard_search_query:
+        dashboard_order_columns.append(Order.description)
+    dashboard_order_options = [
+        load_only(*dashboard_order_columns),
+        selectinload(Order.user),
+        selectinload(Order.category),
+        selectinload(Order.area),
+    ]
+    if DEBUG_RAISE_LAZY_LOADS:
+        # Entwicklung: jede weitere Beziehung im Template waere ein N+1 -> sofort auffallen
+        dashboard_order_options.append(raiseload("*"))
+    order_query = order_query.options(*dashboard_order_options)
+
+    if dashboard_search_query:
+        # Volltextsuche (inkl. formatierter Datumswerte) bleibt in Python
+        orders = order_query.order_by(Order.created_at.desc()).all()
         search_term = dashboard_search_query.lower()
 
         def _dashboard_search_values(order):
@@ -6785,31 +7261,71 @@ def dashboard():
             if any(search_term in value.lower() for value in _dashboard_search_values(order))
         ]
 
-    def _dashboard_sort_value(order):
-        if sort_by == "category":
-            category = get_order_category(order)
-            return ((category.name if category else "") or "").lower()
-        if sort_by == "area":
-            return ((order.area.name if order.area else "") or "").lower()
-        if sort_by == "title":
-            return (order.title or "").lower()
-        if sort_by == "status":
-            return (status_context["order_status_labels"].get(order.status, order.status) or "").lower()
-        if sort_by == "owner":
-            return ((order.user.email if order.user else "") or "").lower()
-        if sort_by == "created":
+        def _dashboard_sort_value(order):
+            if sort_by == "category":
+                category = get_order_category(order)
+                return ((category.name if category else "") or "").lower()
+            if sort_by == "area":
+                return ((order.area.name if order.area else "") or "").lower()
+            if sort_by == "title":
+                return (order.title or "").lower()
+            if sort_by == "status":
+                return (status_context["order_status_labels"].get(order.status, order.status) or "").lower()
+            if sort_by == "owner":
+                return ((order.user.email if order.user else "") or "").lower()
             return order.created_at or datetime.min
-        return order.created_at or datetime.min
 
-    orders.sort(key=_dashboard_sort_value, reverse=(sort_dir == "desc"))
+        orders.sort(key=_dashboard_sort_value, reverse=(sort_dir == "desc"))
 
-    total_orders = len(orders)
-    total_pages = max(1, math.ceil(total_orders / per_page))
-    if page > total_pages:
-        page = total_pages
-    page_start = (page - 1) * per_page
-    page_end = page_start + per_page
-    paginated_orders = orders[page_start:page_end]
+        total_orders = len(orders)
+        total_pages = max(1, math.ceil(total_orders / per_page))
+        if page > total_pages:
+            page = total_pages
+        page_start = (page - 1) * per_page
+        page_end = page_start + per_page
+        paginated_orders = orders[page_start:page_end]
+    else:
+        total_orders = order_query.order_by(None).count()
+        total_pages = max(1, math.ceil(total_orders / per_page))
+        if page > total_pages:
+            page = total_pages
+        page_start = (page - 1) * per_page
+        page_end = page_start + per_page
+
+        sorted_query = order_query
+        if sort_by == "category":
+            sorted_query = sorted_query.outerjoin(OrderCategory, Order.category_id == OrderCategory.id)
+            sort_expr = func.lower(
+                func.coalesce(OrderCategory.name, default_category.name if default_category else "")
+            )
+        elif sort_by == "area":
+            sorted_query = sorted_query.outerjoin(OrderArea, Order.area_id == OrderArea.id)
+            sort_expr = func.lower(func.coalesce(OrderArea.name, ""))
+        elif sort_by == "title":
+            sort_expr = func.lower(func.coalesce(Order.title, ""))
+        elif sort_by == "status":
+            status_labels = {
+                key: (label or "").lower()
+                for key, label in status_context["order_status_labels"].items()
+                if key
+            }
+            fallback_expr = func.lower(func.coalesce(Order.status, ""))
+            sort_expr = case(status_labels, value=Order.status, else_=fallback_expr) if status_labels else fallback_expr
+        elif sort_by == "owner":
+            sorted_query = sorted_query.outerjoin(User, Order.user_id == User.id)
+            sort_expr = func.lower(func.coalesce(User.email, ""))
+        else:
+            sort_expr = Order.created_at
+        sort_clause = sort_expr.desc() if sort_dir == "desc" else sort_expr.asc()
+
+        # Gleichstaende wie bisher nach Erstellzeit (neueste zuerst)
+        paginated_orders = (
+            sorted_query
+            .order_by(sort_clause, Order.created_at.desc(), Order.id.desc())
+            .offset(page_start)
+            .limit(per_page)
+            .all()
+        )
 
     order_ids = [o.id for o in paginated_orders]
     plotter_order_ids = [o.id for o in paginated_orders if is_plotter_order(o)]
@@ -6818,117 +7334,108 @@ def dashboard():
         o.id for o in paginated_orders
         if not is_plotter_order(o) and not is_procurement_order(o)
     ]
-    for o in paginated_orders:
-        app.logger.debug(
-            f"[dashboard] Order id={o.id}, title={o.title!r}, status={o.status!r}"
-        )
+    if app.logger.isEnabledFor(logging.DEBUG):
+        for o in paginated_orders:
+            app.logger.debug("[dashboard] Order id=%s, title=%r, status=%r", o.id, o.title, o.status)
 
-    # 2) Anzahl Dateien pro Order ermitteln
+    # 2) Anzahl Dateien/Druckjobs, letzte Nachricht (Order.last_message_at) und eigener
+    #    Lese-Status pro Order in einer Abfrage;
+    #    "last_new_message" (fuer das "new message"-Badge) entscheidet direkt die DB
     file_counts = {}
-    if print_order_ids:
-        file_count_rows = (
+    print_job_counts = {}
+    last_new_message = {o.id: None for o in paginated_orders}
+    if order_ids:
+        file_count_sq = (
             db.session.query(
-                OrderFile.order_id,
-                func.count(OrderFile.id)
+                OrderFile.order_id.label("order_id"),
+                func.count(OrderFile.id).label("item_count"),
             )
             .filter(OrderFile.order_id.in_(print_order_ids))
             .group_by(OrderFile.order_id)
-            .all()
+            .subquery()
         )
-        file_counts = {order_id: count for order_id, count in file_count_rows}
-    if plotter_order_ids:
-        poster_count_rows = (
+        poster_count_sq = (
             db.session.query(
-                OrderPosterFile.order_id,
-                func.count(OrderPosterFile.id)
+                OrderPosterFile.order_id.label("order_id"),
+                func.count(OrderPosterFile.id).label("item_count"),
             )
             .filter(OrderPosterFile.order_id.in_(plotter_order_ids))
             .group_by(OrderPosterFile.order_id)
-            .all()
+            .subquery()
         )
-        file_counts.update({order_id: count for order_id, count in poster_count_rows})
-    if procurement_order_ids:
-        procurement_count_rows = (
+        procurement_count_sq = (
             db.session.query(
-                OrderProcurementArticle.order_id,
-                func.count(OrderProcurementArticle.id)
+                OrderProcurementArticle.order_id.label("order_id"),
+                func.count(OrderProcurementArticle.id).label("item_count"),
             )
             .filter(OrderProcurementArticle.order_id.in_(procurement_order_ids))
             .group_by(OrderProcurementArticle.order_id)
-            .all()
+            .subquery()
         )
-        file_counts.update({order_id: count for order_id, count in procurement_count_rows})
-
-    app.logger.debug(f"[dashboard] file_counts: {file_counts}")
-
-    print_job_counts = {}
-    if print_order_ids:
-        print_job_rows = (
+        print_job_sq = (
             db.session.query(
-                OrderPrintJob.order_id,
-                OrderPrintJob.status,
-                func.count(OrderPrintJob.id),
+                OrderPrintJob.order_id.label("order_id"),
+                func.count(OrderPrintJob.id).label("total"),
+                *(
+                    func.sum(case((OrderPrintJob.status == job_status, 1), else_=0)).label(job_status)
+                    for job_status in PRINT_JOB_SUMMARY_STATUSES
+                ),
             )
             .filter(OrderPrintJob.order_id.in_(print_order_ids))
-            .group_by(OrderPrintJob.order_id, OrderPrintJob.status)
-            .all()
+            .group_by(OrderPrintJob.order_id)
+            .subquery()
         )
-        for order_id, status, count in print_job_rows:
-            summary = print_job_counts.setdefault(
-                order_id,
-                {"total": 0, "started": 0, "finished": 0, "error": 0},
+        latest_created = Order.last_message_at
+        aggregate_rows = (
+            db.session.query(
+                Order.id,
+                func.coalesce(
+                    file_count_sq.c.item_count,
+                    poster_count_sq.c.item_count,
+                    procurement_count_sq.c.item_count,
+                ),
+                case(
+                    (
+                        or_(
+                            OrderReadStatus.last_read_at.is_(None),
+                            latest_created > OrderReadStatus.last_read_at,
+                        ),
+                        latest_created,
+                    ),
+                    else_=None,
+                ),
+                print_job_sq.c.total,
+                *(print_job_sq.c[job_status] for job_status in PRINT_JOB_SUMMARY_STATUSES),
             )
-            summary["total"] += count
-            if status in ("started", "finished", "error"):
-                summary[status] += count
-
-    app.logger.debug(f"[dashboard] print_job_counts: {print_job_counts}")
-
-    # 3) Latest message per order (Zeitstempel der letzten Nachricht)
-    latest_messages = (
-        db.session.query(
-            OrderMessage.order_id,
-            func.max(OrderMessage.created_at).label("latest_created"),
-        )
-        .filter(OrderMessage.order_id.in_(order_ids))
-        .group_by(OrderMessage.order_id)
-        .all()
-    )
-    latest_by_order = {order_id: latest_created for order_id, latest_created in latest_messages}
-    app.logger.debug(f"[dashboard] latest_by_order: {latest_by_order}")
-
-    # 4) Persistente Read-Zeitpunkte aus der Datenbank holen (pro Order)
-    read_by_order = {}
-    if order_ids:
-        read_rows = (
-            OrderReadStatus.query
-            .filter(
-                OrderReadStatus.user_id == current_user.id,
-                OrderReadStatus.order_id.in_(order_ids),
+            .outerjoin(file_count_sq, file_count_sq.c.order_id == Order.id)
+            .outerjoin(poster_count_sq, poster_count_sq.c.order_id == Order.id)
+            .outerjoin(procurement_count_sq, procurement_count_sq.c.order_id == Order.id)
+            .outerjoin(print_job_sq, print_job_sq.c.order_id == Order.id)
+            .outerjoin(
+                OrderReadStatus,
+                and_(
+                    OrderReadStatus.order_id == Order.id,
+                    OrderReadStatus.user_id == current_user.id,
+                ),
             )
+            .filter(Order.id.in_(order_ids))
             .all()
         )
-        read_by_order = {entry.order_id: entry.last_read_at for entry in read_rows}
-
-    app.logger.debug(f"[dashboard] read_by_order (database): {read_by_order}")
-
-    # 5) "last_new_message" pro Order berechnen (f├╝r "new message"-Badge)
-    last_new_message = {}
-    for o in paginated_orders:
-        latest = latest_by_order.get(o.id)      # datetime oder None
-        last_read = read_by_order.get(o.id)     # datetime oder None
-
-        if latest is None:
-            last_new_message[o.id] = None
-        else:
-            if last_read is None or latest > last_read:
-                last_new_message[o.id] = latest
-            else:
-                last_new_message[o.id] = None
-
-        app.logger.debug(
-            f"[dashboard] Computed last_new_message for order {o.id}: {last_new_message[o.id]!r}"
-        )
+        for order_id, item_count, unread_at, job_total, *job_status_counts in aggregate_rows:
+            if item_count:
+                file_counts[order_id] = item_count
+            last_new_message[order_id] = unread_at
+            if job_total:
+                print_job_counts[order_id] = {
+                    "total": job_total,
+                    **dict(zip(PRINT_JOB_SUMMARY_STATUSES, job_status_counts)),
+                }
+
+    app.logger.debug("[dashboard] file_counts: %s", file_counts)
+    app.logger.debug("[dashboard] print_job_counts: %s", print_job_counts)
+
+    if app.logger.isEnabledFor(logging.DEBUG):
+        app.logger.debug("[dashboard] Computed last_new_message: %r", last_new_message)
 
     announcements = Announcement.query.order_by(Announcement.created_at.desc()).all()
     announcement_reads = AnnouncementRead.query.filter_by(user_id=current_user.id).all()
@@ -6936,7 +7443,7 @@ def dashboard():
     announcements_unread = [a for a in announcements if a.id not in read_by_announcement]
     announcements_read = [a for a in announcements if a.id in read_by_announcement]
 
-    return render_template(
+    html = render_template(
         "dashboard.html",
         orders=paginated_orders,
         last_new_message=last_new_message,
@@ -6969,6 +7476,20 @@ def dashboard():
         page_end=min(page_end, total_orders),
     )
 
+    # Badges sind fuer diesen Aufruf schon gerendert; danach alle als gelesen markieren
+    unread_order_ids = [order_id for order_id, unread_at in last_new_message.items() if unread_at]
+    if DASHBOARD_MARKS_ORDERS_READ and request.method == "GET" and unread_order_ids:
+        try:
+            mark_orders_read(unread_order_ids, current_user.id, datetime.utcnow())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception(
+                "[dashboard] Failed to mark %s order(s) read for user=%s",
+                len(unread_order_ids), current_user.id,
+            )
+    return html
+
 
 @app.route("/announcements/update", methods=["POST"])
 @login_required
@@ -7025,9 +7546,10 @@ def logout():
     write_audit_log(app, "user_logout", user=current_user)
     logout_user()
     session.clear()
-    trans = inject_globals().get("t")
-    flash(trans("flash_logged_out"), "info")
-    return redirect(url_for("landing"))
+    # Nach logout_user() ist der User anonym, t() liefert ohnehin die Default-Sprache;
+    # inject_globals() wuerde dafuer nur unnoetig Settings und Status-Kontext laden.
+    flash(get_translations(DEFAULT_LANG).get("flash_logged_out", "flash_logged_out"), "info")
+    return redirect(url_for("landing"), code=303)
 
 
 # ============================================================
@@ -7043,6 +7565,23 @@ def _pdf_escape(text_value: str) -> str:
     return text_value.encode("latin-1", "replace").decode("latin-1")
 
 
+# MIME-Typen der Vorschaubilder, die beim PDF-Export eingebettet werden
+IMAGE_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+def _image_mime_type(path: Path) -> str:
+    mime = IMAGE_MIME_TYPES.get(path.suffix.lower())
+    if mime:
+        return mime
+    return mimetypes.guess_type(path.name)[0] or "image/png"
+
+
 def build_order_context(order, translator) -> dict:
     def fmt_dt(dt):
         return format_local_datetime(dt) if dt else ""
@@ -7068,9 +7607,7 @@ def build_order_context(order, translator) -> dict:
         if not chosen or not chosen.exists():
             return ""
 
-        mime, _ = mimetypes.guess_type(chosen.name)
-        if not mime:
-            mime = "image/png"
+        mime = _image_mime_type(chosen)
         try:
             data = base64.b64encode(chosen.read_bytes()).decode("ascii")
             return f"data:{mime};base64,{data}"
@@ -7082,7 +7619,7 @@ def build_order_context(order, translator) -> dict:
         if (file_entry.file_type or "").lower() != "stl":
             return ""
 
-        base_folder = Path(app.config["UPLOAD_FOLDER"]) / f"order_{order.id}"
+        base_folder = order_folder_path(order.id)
         original_path = base_folder / file_entry.stored_name
         thumb_folder = base_folder / "thumbnails"
         thumb_sm_name, thumb_lg_name = _build_model_thumbnail_names(file_entry.stored_name)
@@ -7107,9 +7644,7 @@ def build_order_context(order, translator) -> dict:
         if not chosen or not chosen.exists():
             return ""
 
-        mime, _ = mimetypes.guess_type(chosen.name)
-        if not mime:
-            mime = "image/png"
+        mime = _image_mime_type(chosen)
         try:
             data = base64.b64encode(chosen.read_bytes()).decode("ascii")
             return f"data:{mime};base64,{data}"
@@ -7135,9 +7670,7 @@ def build_order_context(order, translator) -> dict:
         if not chosen or not chosen.exists():
             return ""
 
-        mime, _ = mimetypes.guess_type(chosen.name)
-        if not mime:
-            mime = "image/png"
+        mime = _image_mime_type(chosen)
         try:
             data = base64.b64encode(chosen.read_bytes()).decode("ascii")
             return f"data:{mime};base64,{data}"
@@ -7280,6 +7813,23 @@ def build_order_context(order, translator) -> dict:
     }
 
 
+# Jinja-Environments fuer PDF-Templates pro Ordner wiederverwenden, damit das
+# kompilierte Template im Cache bleibt (auto_reload prueft weiterhin die mtime).
+_pdf_template_envs: Dict[str, Environment] = {}
+
+
+def _pdf_template_env(folder: str) -> Environment:
+    env = _pdf_template_envs.get(folder)
+    if env is None:
+        env = Environment(
+            loader=FileSystemLoader(folder),
+            autoescape=select_autoescape(["html", "xml"]),
+            bytecode_cache=TEMPLATE_BYTECODE_CACHE,
+        )
+        _pdf_template_envs[folder] = env
+    return env
+
+
 def render_pdf_with_template(template_path: str, context: dict) -> bytes:
     if not XHTML2PDF_AVAILABLE:
         app.logger.info(
@@ -7297,11 +7847,7 @@ def render_pdf_with_template(template_path: str, context: dict) -> bytes:
         app.logger.info("PDF template not found at %s, skipping template-based PDF.", tpl_path)
         return b""
 
-    env = Environment(
-        loader=FileSystemLoader(str(tpl_path.parent)),
-        autoescape=select_autoescape(["html", "xml"]),
-    )
-    tpl = env.get_template(tpl_path.name)
+    tpl = _pdf_template_env(str(tpl_path.parent)).get_template(tpl_path.name)
     html = tpl.render(**context)
 
     result = BytesIO()
@@ -7586,15 +8132,28 @@ def _build_order_pdf(order, translator) -> bytes:
 @app.route("/admin/orders/<int:order_id>/pdf")
 @roles_required("admin")
 def admin_order_pdf(order_id):
-    order = Order.query.get_or_404(order_id)
+    # Nachrichten samt Autor in einem Schritt laden (sonst eine Abfrage pro Nachricht)
+    order = db.get_or_404(
+        Order,
+        order_id,
+        options=[selectinload(Order.messages).selectinload(OrderMessage.user)],
+    )
     trans = inject_globals().get("t")
-    context = build_order_context(order, trans)
+
+    # Der Kontext (inkl. Base64-Thumbnails) wird nur fuer das HTML-Template gebraucht.
+    use_template = bool(
+        XHTML2PDF_AVAILABLE
+        and PDF_TEMPLATE_PATH
+        and Path(PDF_TEMPLATE_PATH).exists()
+    )
 
     pdf_bytes = b""
-    try:
-        pdf_bytes = render_pdf_with_template(PDF_TEMPLATE_PATH, context)
-    except Exception:
-        app.logger.exception("Rendering PDF from template failed, falling back to default PDF.")
+    if use_template:
+        context = build_order_context(order, trans)
+        try:
+            pdf_bytes = render_pdf_with_template(PDF_TEMPLATE_PATH, context)
+        except Exception:
+            app.logger.exception("Rendering PDF from template failed, falling back to default PDF.")
 
     if not pdf_bytes:
         app.logger.info("Fallback to built-in PDF generator for order %s", order_id)
@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timezone
 from functools import wraps
 from typing import Callable
 
@@ -6,9 +7,11 @@ from flask import session, redirect, url_for, flash, request
 from flask_login import current_user, login_required, logout_user
 from werkzeug.exceptions import abort
 
-from config import DEFAULT_SETTINGS, coerce_positive_int, load_app_settings
+from config import DEFAULT_SETTINGS
 
 SESSION_LAST_ACTIVE_KEY = "last_active_utc"
+# Fallback, falls die Settings noch nie geladen wurden (sonst app.config["SESSION_TIMEOUT_SECONDS"])
+DEFAULT_SESSION_TIMEOUT_SECONDS = DEFAULT_SETTINGS["session_timeout_minutes"] * 60
 
 
 def roles_required(*roles):
@@ -18,12 +21,13 @@ def roles_required(*roles):
         @roles_required("admin")
         @roles_required("admin", "manager")
     """
+    allowed_roles = frozenset(roles)
 
     def decorator(view_func):
         @wraps(view_func)
         @login_required
         def wrapped(*args, **kwargs):
-            if current_user.role not in roles:
+            if current_user.role not in allowed_roles:
                 abort(403)
             return view_func(*args, **kwargs)
 
@@ -32,6 +36,21 @@ def roles_required(*roles):
     return decorator
 
 
+def session_timestamp(value) -> int | None:
+    """
+    Letzte Aktivitaet aus der Session als Unix-Zeit (Sekunden). Aeltere Sessions
+    enthalten noch einen ISO-String (naive UTC) und werden hier einmal umgerechnet.
+    """
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+        except ValueError:
+            return None
+    return None
+
+
 def register_session_timeout(app, get_translator: Callable[[], Callable[[str], str] | None]):
     """
     Registriert einen before_request-Handler, der Inaktivitaetstimeout durchsetzt.
@@ -39,32 +58,25 @@ def register_session_timeout(app, get_translator: Callable[[], Callable[[str], s
 
     @app.before_request
     def enforce_session_timeout():
+        # Statische Dateien zuerst aussortieren: kein User-Load, kein Session-Zugriff
+        if (request.endpoint or "").startswith("static"):
+            return
         if not current_user.is_authenticated:
             return
 
-        settings = load_app_settings(app)
-        timeout_minutes = coerce_positive_int(
-            settings.get("session_timeout_minutes"),
-            DEFAULT_SETTINGS["session_timeout_minutes"],
-        )
-
-        now = datetime.utcnow()
-        last_seen_raw = session.get(SESSION_LAST_ACTIVE_KEY)
-
-        if last_seen_raw:
-            try:
-                last_seen = datetime.fromisoformat(last_seen_raw)
-            except Exception:
-                last_seen = None
-
-            if last_seen and now - last_seen > timedelta(minutes=timeout_minutes):
-                logout_user()
-                session.clear()
-                trans = get_translator() or (lambda key: key)
-                flash(trans("flash_session_expired"), "warning")
-                return redirect(url_for("login"))
-
-        is_static_request = (request.endpoint or "").startswith("static")
-        if not is_static_request:
+        timeout_seconds = app.config.get("SESSION_TIMEOUT_SECONDS", DEFAULT_SESSION_TIMEOUT_SECONDS)
+
+        now_ts = int(time.time())
+        last_seen_ts = session_timestamp(session.get(SESSION_LAST_ACTIVE_KEY))
+
+        if last_seen_ts is not None and now_ts - last_seen_ts > timeout_seconds:
+            logout_user()
+            session.clear()
+            trans = get_translator() or (lambda key: key)
+            flash(trans("flash_session_expired"), "warning")
+            return redirect(url_for("login"))
+
+        # Innerhalb derselben Sekunde bleibt die Session unveraendert (kein neues Cookie)
+        if last_seen_ts != now_ts:
             session.permanent = True
-            session[SESSION_LAST_ACTIVE_KEY] = now.isoformat()
+            session[SESSION_LAST_ACTIVE_KEY] = now_ts
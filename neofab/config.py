@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import re
+import time
 from datetime import timedelta
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -99,6 +100,10 @@ DASHBOARD_ROWS_PER_PAGE_OPTIONS = (10, 25, 50)
 
 _settings_cache: Optional[Dict[str, Any]] = None
 _settings_mtime: Optional[float] = None
+# Die mtime-Pruefung (ein stat() pro Aufruf) laeuft hoechstens alle paar Sekunden;
+# Aenderungen aus anderen Worker-Prozessen werden damit spaetestens nach dieser Zeit sichtbar.
+SETTINGS_RECHECK_SECONDS = 2.0
+_settings_last_check = 0.0
 
 log = logging.getLogger(__name__)
 
@@ -246,6 +251,8 @@ def _apply_session_timeout_setting(app, timeout_minutes: int) -> int:
         DEFAULT_SETTINGS["session_timeout_minutes"],
     )
     app.permanent_session_lifetime = timedelta(minutes=timeout_minutes)
+    # Fuer den before_request-Timeout-Check, der so ohne load_app_settings auskommt
+    app.config["SESSION_TIMEOUT_SECONDS"] = timeout_minutes * 60
     return timeout_minutes
 
 
@@ -295,19 +302,29 @@ def _encrypt_secret(value: str) -> tuple[str, bool]:
         return value, False
 
 
+def reset_settings_cache() -> None:
+    """Erzwingt beim naechsten load_app_settings() wieder die mtime-Pruefung."""
+    global _settings_last_check
+    _settings_last_check = 0.0
+
+
 def load_app_settings(app, force_reload: bool = False) -> Dict[str, Any]:
     """
     Laedt die JSON-Konfiguration mit Fallback auf Defaults.
     Erkennt externe Aenderungen ueber mtime und laedt bei Bedarf neu.
     """
-    global _settings_cache, _settings_mtime
+    global _settings_cache, _settings_mtime, _settings_last_check
 
     if not force_reload and _settings_cache is not None:
+        now = time.monotonic()
+        if now - _settings_last_check < SETTINGS_RECHECK_SECONDS:
+            return _settings_cache
         try:
             current_mtime = SETTINGS_FILE.stat().st_mtime
         except FileNotFoundError:
             current_mtime = None
         if current_mtime == _settings_mtime:
+            _settings_last_check = now
             return _settings_cache
 
     settings = DEFAULT_SETTINGS.copy()
@@ -398,6 +415,7 @@ def load_app_settings(app, force_reload: bool = False) -> Dict[str, Any]:
         settings["session_timeout_minutes"],
     )
     _settings_cache = settings
+    _settings_last_check = time.monotonic()
     return settings
 
 
@@ -494,6 +512,7 @@ def save_app_settings(app, new_settings: Dict[str, Any]) -> Dict[str, Any]:
             json.dump(persist_settings, f, ensure_ascii=False, indent=2)
         _settings_mtime = SETTINGS_FILE.stat().st_mtime
         _settings_cache = settings
+        reset_settings_cache()
     except Exception as exc:
         log.error("Could not write settings to %s: %s", SETTINGS_FILE, exc)
         raise
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import atexit
+from datetime import datetime
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+from time import monotonic
+from typing import Dict, Optional
+
+from sqlalchemy import update
+
+from models import User, db
+
+# last_login_at wird nicht im Login-Request committet, sondern von einem
+# Hintergrund-Thread pro Prozess gesammelt geschrieben (max. 50 User bzw. 0,5 s).
+LOGIN_WRITE_BATCH_SIZE = 50
+LOGIN_WRITE_FLUSH_SECONDS = 0.5
+
+_login_queue: SimpleQueue = SimpleQueue()
+_STOP = object()
+_writer_thread: Optional[Thread] = None
+_writer_lock = Lock()
+
+
+def queue_last_login(app, user_id: int, login_at: datetime) -> None:
+    """
+    Merkt last_login_at fuer den Hintergrund-Writer vor. Der Thread wird erst beim
+    ersten Login gestartet, also nach einem Gunicorn-Fork im jeweiligen Worker.
+    """
+    _ensure_writer(app)
+    _login_queue.put((user_id, login_at))
+
+
+def _ensure_writer(app) -> None:
+    global _writer_thread
+    if _writer_thread is not None and _writer_thread.is_alive():
+        return
+    with _writer_lock:
+        if _writer_thread is not None and _writer_thread.is_alive():
+            return
+        if _writer_thread is None:
+            # Beim Beenden des Prozesses noch Ausstehendes schreiben
+            atexit.register(stop_login_writer)
+        _writer_thread = Thread(target=_writer_loop, args=(app,), name="neofab-login-writer", daemon=True)
+        _writer_thread.start()
+
+
+def _add_to_batch(batch: Dict[int, datetime], user_id: int, login_at: datetime) -> None:
+    previous = batch.get(user_id)
+    batch[user_id] = login_at if previous is None else max(previous, login_at)
+
+
+def _write_batch(app, batch: Dict[int, datetime]) -> None:
+    with app.app_context():
+        try:
+            db.session.execute(
+                update(User),
+                [{"id": user_id, "last_login_at": login_at} for user_id, login_at in batch.items()],
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Failed to write %s deferred last_login_at update(s)", len(batch))
+
+
+def _writer_loop(app) -> None:
+    """
+    Wartet auf den ersten Eintrag und sammelt dann bis Batch-Groesse oder Zeitlimit.
+    Endet nach dem Stop-Marker, sobald alles davor geschrieben ist.
+    """
+    stopping = False
+    while not stopping:
+        entry = _login_queue.get()
+        if entry is _STOP:
+            return
+        batch: Dict[int, datetime] = {}
+        _add_to_batch(batch, *entry)
+        deadline = monotonic() + LOGIN_WRITE_FLUSH_SECONDS
+        while len(batch) < LOGIN_WRITE_BATCH_SIZE:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = _login_queue.get(timeout=remaining)
+            except Empty:
+                break
+            if entry is _STOP:
+                stopping = True
+                break
+            _add_to_batch(batch, *entry)
+        _write_batch(app, batch)
+
+
+def stop_login_writer(timeout: float = 5.0) -> None:
+    thread = _writer_thread
+    if thread is None or not thread.is_alive():
+        return
+    _login_queue.put(_STOP)
+    thread.join(timeout)
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Callable
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from version import APP_VERSION
+
+
+def page_etag(*parts) -> str:
+    """
+    Baut einen ETag fuer eine HTML-Seite aus den uebergebenen Datenstaenden plus
+    allem, was base.html vom User anzeigt (Name, E-Mail, Rolle, Sprache, Theme).
+    Gehasht, damit keine personenbezogenen Daten im Header landen.
+    """
+    if current_user.is_authenticated:
+        user_parts = (
+            current_user.id,
+            current_user.email,
+            current_user.first_name,
+            current_user.last_name,
+            current_user.role,
+            current_user.language,
+            getattr(current_user, "theme_mode", None),
+        )
+    else:
+        user_parts = ("anonymous",)
+    raw = "|".join(str(part) for part in (APP_VERSION, *user_parts, *parts))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def conditional_page(etag: str, render: Callable[[], str]):
+    """
+    Antwortet mit 304, wenn der Browser die Seite mit diesem ETag schon hat; sonst
+    wird render() aufgerufen. Seiten mit anstehenden Flash-Meldungen werden immer
+    gerendert und ohne ETag ausgeliefert, sonst erschiene die Meldung erneut.
+    """
+    has_flashes = "_flashes" in session
+    if not has_flashes and request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render())
+    if not has_flashes:
+        response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 from markupsafe import Markup, escape
 
@@ -12,13 +13,56 @@ except Exception:
     markdown = None
 
 
+# Fuer bleach.clean erlaubte Tags/Attribute, einmal beim Import aufgebaut
+if bleach:
+    _ALLOWED_TAGS = frozenset(tag for tag in bleach.sanitizer.ALLOWED_TAGS if tag != "a") | {
+        "p",
+        "pre",
+        "span",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "table",
+        "thead",
+        "tbody",
+        "tr",
+        "th",
+        "td",
+        "code",
+        "hr",
+        "br",
+        "ul",
+        "ol",
+        "li",
+        "blockquote",
+    }
+    _ALLOWED_ATTRS = {
+        "code": ["class"],
+    }
+
+
+# Muster einmal beim Import kompilieren; die Zeilenschleife nutzt sie direkt
+_RE_LINK = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+_RE_CODE = re.compile(r"`([^`]+)`")
+_RE_BOLD_STAR = re.compile(r"\*\*([^*]+)\*\*")
+_RE_BOLD_UNDERSCORE = re.compile(r"__([^_]+)__")
+_RE_EM_STAR = re.compile(r"\*([^*]+)\*")
+_RE_EM_UNDERSCORE = re.compile(r"_([^_]+)_")
+_RE_HEADING = re.compile(r"^(#{1,6})\s+(.+)$")
+_RE_UL_ITEM = re.compile(r"^\s*[-*+]\s+(.+)$")
+_RE_OL_ITEM = re.compile(r"^\s*\d+[.)]\s+(.+)$")
+
+
 def _apply_inline(markup_text: str) -> str:
-    markup_text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", markup_text)
-    markup_text = re.sub(r"`([^`]+)`", r"<code>\1</code>", markup_text)
-    markup_text = re.sub(r"\*\*([^*]+)\*\*", r"<strong>\1</strong>", markup_text)
-    markup_text = re.sub(r"__([^_]+)__", r"<strong>\1</strong>", markup_text)
-    markup_text = re.sub(r"\*([^*]+)\*", r"<em>\1</em>", markup_text)
-    markup_text = re.sub(r"_([^_]+)_", r"<em>\1</em>", markup_text)
+    markup_text = _RE_LINK.sub(r"\1", markup_text)
+    markup_text = _RE_CODE.sub(r"<code>\1</code>", markup_text)
+    markup_text = _RE_BOLD_STAR.sub(r"<strong>\1</strong>", markup_text)
+    markup_text = _RE_BOLD_UNDERSCORE.sub(r"<strong>\1</strong>", markup_text)
+    markup_text = _RE_EM_STAR.sub(r"<em>\1</em>", markup_text)
+    markup_text = _RE_EM_UNDERSCORE.sub(r"<em>\1</em>", markup_text)
     return markup_text
 
 
@@ -71,7 +115,7 @@ def _basic_markdown_to_html(raw_text: str) -> str:
             close_lists()
             continue
 
-        heading_match = re.match(r"^(#{1,6})\s+(.+)$", line)
+        heading_match = _RE_HEADING.match(line)
         if heading_match:
             flush_paragraph()
             close_lists()
@@ -80,7 +124,7 @@ def _basic_markdown_to_html(raw_text: str) -> str:
             html_parts.append(f"<h{level}>{content}</h{level}>")
             continue
 
-        ul_match = re.match(r"^\s*[-*+]\s+(.+)$", line)
+        ul_match = _RE_UL_ITEM.match(line)
         if ul_match:
             flush_paragraph()
             if in_ol:
@@ -92,7 +136,7 @@ def _basic_markdown_to_html(raw_text: str) -> str:
             html_parts.append("<li>" + _apply_inline(ul_match.group(1).strip()) + "</li>")
             continue
 
-        ol_match = re.match(r"^\s*\d+[.)]\s+(.+)$", line)
+        ol_match = _RE_OL_ITEM.match(line)
         if ol_match:
             flush_paragraph()
             if in_ul:
@@ -116,47 +160,25 @@ def _basic_markdown_to_html(raw_text: str) -> str:
 
 
 def render_legal_markdown(text: str) -> Markup:
+    return Markup(_render_legal_html(text or ""))
+
+
+# Rechtstexte/Ankuendigungen aendern sich selten; markdown + bleach nur einmal pro Text
+@lru_cache(maxsize=64)
+def _render_legal_html(text: str) -> str:
     if not markdown or not bleach:
-        return Markup(_basic_markdown_to_html(text or ""))
+        return _basic_markdown_to_html(text)
 
     html = markdown.markdown(
-        text or "",
+        text,
         extensions=["extra", "sane_lists", "tables"],
         output_format="html",
     )
 
-    allowed_tags = [tag for tag in bleach.sanitizer.ALLOWED_TAGS if tag != "a"] + [
-        "p",
-        "pre",
-        "span",
-        "h1",
-        "h2",
-        "h3",
-        "h4",
-        "h5",
-        "h6",
-        "table",
-        "thead",
-        "tbody",
-        "tr",
-        "th",
-        "td",
-        "code",
-        "hr",
-        "br",
-        "ul",
-        "ol",
-        "li",
-        "blockquote",
-    ]
-    allowed_attrs = {
-        "code": ["class"],
-    }
-
     cleaned = bleach.clean(
         html,
-        tags=allowed_tags,
-        attributes=allowed_attrs,
+        tags=_ALLOWED_TAGS,
+        attributes=_ALLOWED_ATTRS,
         strip=True,
     )
-    return Markup(cleaned)
+    return cleaned
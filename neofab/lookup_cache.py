@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from threading import Lock
+from time import monotonic
+from typing import Dict, List, Tuple
+
+from models import Color, CostCenter, Material, db
+
+# Auswahllisten (Material/Farbe/Kostenstelle) aendern sich selten; pro Prozess
+# kurz zwischenspeichern. Admin-CRUD ruft invalidate_lookup_cache() auf.
+LOOKUP_CACHE_TTL_SECONDS = 60
+
+_lookup_cache: Dict[str, Tuple[float, list]] = {}
+_lookup_lock = Lock()
+
+
+def _load_materials() -> list:
+    return db.session.query(Material.id, Material.name).order_by(Material.name.asc()).all()
+
+
+def _load_colors() -> list:
+    return db.session.query(Color.id, Color.name, Color.hex_code).order_by(Color.name.asc()).all()
+
+
+def _load_cost_centers() -> list:
+    return (
+        db.session.query(CostCenter.id, CostCenter.name)
+        .filter(CostCenter.is_active.is_(True))
+        .order_by(CostCenter.name.asc())
+        .all()
+    )
+
+
+_LOADERS = {
+    "materials": _load_materials,
+    "colors": _load_colors,
+    "cost_centers": _load_cost_centers,
+}
+
+
+def get_lookup(name: str) -> List:
+    """
+    Returns the cached rows (id, name, ...) for a dropdown list.
+    Rows are plain column tuples, so they are safe to reuse across sessions.
+    """
+    now = monotonic()
+    entry = _lookup_cache.get(name)
+    if entry and entry[0] > now:
+        return entry[1]
+    rows = _LOADERS[name]()
+    with _lookup_lock:
+        _lookup_cache[name] = (now + LOOKUP_CACHE_TTL_SECONDS, rows)
+    return rows
+
+
+def lookup_contains(name: str, row_id: int) -> bool:
+    """Prueft eine ausgewaehlte ID gegen die gecachte Auswahlliste statt per SELECT."""
+    return any(row[0] == row_id for row in get_lookup(name))
+
+
+def get_lookups() -> Tuple[List, List, List]:
+    return get_lookup("materials"), get_lookup("colors"), get_lookup("cost_centers")
+
+
+def invalidate_lookup_cache() -> None:
+    with _lookup_lock:
+        _lookup_cache.clear()
@@ -1,11 +1,68 @@
+import os
 from datetime import datetime
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event, lambda_stmt, or_, select
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except Exception:
+    PasswordHasher = None
+
 db = SQLAlchemy()
 
+# Passwort-Hashing: argon2 (argon2-cffi, native) wenn installiert, sonst Werkzeug.
+# Bestehende Werkzeug-Hashes bleiben gueltig und werden beim Login umgestellt.
+# Parameter auf ca. 250-500 ms pro Verify abgestimmt (64 MiB, 3 Durchlaeufe, 2 Lanes);
+# Hashes mit den frueheren, schwaecheren Parametern werden per check_needs_rehash erneuert.
+ARGON2_HASH_PREFIX = "$argon2"
+ARGON2_TIME_COST = 3
+ARGON2_MEMORY_COST_KIB = 65536
+ARGON2_PARALLELISM = 2
+_argon2_hasher = (
+    PasswordHasher(
+        time_cost=ARGON2_TIME_COST,
+        memory_cost=ARGON2_MEMORY_COST_KIB,
+        parallelism=ARGON2_PARALLELISM,
+    )
+    if PasswordHasher
+    else None
+)
+
+
+# Im Debug-Modus (FLASK_DEBUG=1) werfen ungeplante Lazy-Loads auf den grossen
+# Collections einen Fehler, damit N+1-Abfragen schon in der Entwicklung auffallen.
+# Aufrufer laden diese Beziehungen explizit per selectinload().
+DEBUG_RAISE_LAZY_LOADS = os.environ.get("FLASK_DEBUG", "").strip().lower() in {"1", "true", "yes", "on"}
+COLLECTION_LAZY = "raise" if DEBUG_RAISE_LAZY_LOADS else "select"
+
+
+def hash_password(password: str) -> str:
+    if _argon2_hasher is not None:
+        return _argon2_hasher.hash(password)
+    return generate_password_hash(password)
+
+
+# Vergleichshash fuer Logins mit unbekannter E-Mail: gleicher Algorithmus und gleiche
+# Kosten wie echte Hashes, damit die Antwortzeit nicht verraet, ob ein Konto existiert.
+_DUMMY_PASSWORD_HASH = hash_password("not-a-real-password")
+
+
+def check_dummy_password(password: str) -> bool:
+    """Fuehrt eine Passwortpruefung ohne User aus und liefert immer False."""
+    if _DUMMY_PASSWORD_HASH.startswith(ARGON2_HASH_PREFIX):
+        try:
+            _argon2_hasher.verify(_DUMMY_PASSWORD_HASH, password)
+        except (VerificationError, InvalidHashError):
+            pass
+    else:
+        check_password_hash(_DUMMY_PASSWORD_HASH, password)
+    return False
+
 
 # --- User-Modell -------------------------------------------------------------
 
@@ -42,13 +99,58 @@ class User(UserMixin, db.Model):
     last_login_at = db.Column(db.DateTime, nullable=True)
 
     # Beziehung zu Aufträgen
-    orders = db.relationship("Order", back_populates="user", lazy=True)
+    orders = db.relationship("Order", back_populates="user", lazy=COLLECTION_LAZY)
+
+    # E-Mail eindeutig auch ohne Ruecksicht auf Gross-/Kleinschreibung
+    __table_args__ = (
+        db.Index("ix_user_email_lower", db.func.lower(email), unique=True),
+    )
+
+    @validates("email")
+    def _normalize_email(self, _key, value):
+        # E-Mails werden immer getrimmt und klein geschrieben gespeichert
+        return value.strip().lower() if isinstance(value, str) else value
 
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        """
+        Prueft das Passwort. Bei Erfolg wird ein veralteter Hash (Werkzeug oder
+        argon2 mit alten Parametern) neu gesetzt; der Aufrufer committet.
+        """
+        if self.password_hash.startswith(ARGON2_HASH_PREFIX):
+            if _argon2_hasher is None:
+                return False
+            try:
+                _argon2_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if _argon2_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+
+        if not check_password_hash(self.password_hash, password):
+            return False
+        if _argon2_hasher is not None:
+            self.set_password(password)
+        return True
+
+    # Login, Passwort-Reset und Registrierung laufen ueber lambda_stmt: die kompilierte
+    # Abfrage wird einmal gecacht, pro Aufruf wird nur noch die E-Mail gebunden.
+    @classmethod
+    def find_by_email(cls, email: str) -> "User | None":
+        stmt = lambda_stmt(lambda: select(User).where(User.email == email).limit(1))
+        return db.session.execute(stmt).scalars().first()
+
+    @classmethod
+    def email_taken(cls, email: str, exclude_id: int | None = None) -> bool:
+        """Dublettenpruefung ohne eine User-Zeile zu laden."""
+        stmt = lambda_stmt(lambda: select(User.id).where(User.email == email))
+        if exclude_id is not None:
+            stmt += lambda s: s.where(User.id != exclude_id)
+        stmt += lambda s: s.limit(1)
+        return db.session.execute(stmt).first() is not None
 
 
 class UserActivationToken(db.Model):
@@ -134,6 +236,8 @@ class Order(db.Model):
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_archived = db.Column(db.Boolean, nullable=False, default=False)
     archived_at = db.Column(db.DateTime, nullable=True)
+    # Zeitpunkt der neuesten Nachricht (denormalisiert, siehe _touch_order_last_message_at)
+    last_message_at = db.Column(db.DateTime, nullable=True)
 
     # Beziehungen
     user = db.relationship("User", back_populates="orders")
@@ -147,12 +251,38 @@ class Order(db.Model):
     print_jobs = db.relationship("OrderPrintJob", back_populates="order", lazy=True)
     poster_files = db.relationship("OrderPosterFile", back_populates="order", lazy=True)
     procurement_articles = db.relationship("OrderProcurementArticle", back_populates="order", lazy=True)
-    messages = db.relationship("OrderMessage", back_populates="order", lazy=True)
-    files = db.relationship("OrderFile", back_populates="order", lazy=True)
+    # Chronologisch sortiert, damit Detailseite/Export nicht auf die rowid-Reihenfolge angewiesen sind
+    messages = db.relationship(
+        "OrderMessage",
+        back_populates="order",
+        lazy=COLLECTION_LAZY,
+        order_by="(OrderMessage.created_at, OrderMessage.id)",
+    )
+    files = db.relationship(
+        "OrderFile",
+        back_populates="order",
+        lazy=True,
+        order_by="(OrderFile.uploaded_at, OrderFile.id)",
+    )
     images = db.relationship("OrderImage", back_populates="order", lazy=True)
     videos = db.relationship("OrderVideo", back_populates="order", lazy=True)
     tags_entry = db.relationship("OrderTag", back_populates="order", uselist=False)
 
+    # Dashboard filtert nach Owner bzw. Status und sortiert nach created_at
+    __table_args__ = (
+        db.Index("ix_orders_user_created", "user_id", "created_at"),
+        # Teilindex nur ueber nicht archivierte Auftraege (Dashboard-Standardfall); die
+        # Bedingung muss wie von SQLAlchemy erzeugt "IS 0" lauten, sonst nutzt SQLite ihn nicht
+        db.Index(
+            "ix_orders_user_created_active",
+            "user_id",
+            "created_at",
+            sqlite_where=db.text("is_archived IS 0"),
+        ),
+        db.Index("ix_orders_status_created", "status", "created_at"),
+        db.Index("ix_orders_created_at", "created_at"),
+    )
+
 
 # --- OrderCategory -----------------------------------------------------------
 
@@ -318,6 +448,26 @@ class OrderMessage(db.Model):
     order = db.relationship("Order", back_populates="messages")
     user = db.relationship("User")
 
+    __table_args__ = (
+        db.Index("ix_order_messages_order_created", "order_id", "created_at"),
+    )
+
+
+@event.listens_for(OrderMessage, "after_insert")
+def _touch_order_last_message_at(_mapper, connection, target):
+    """
+    Fuehrt Order.last_message_at in derselben Transaktion nach, damit Dashboard und
+    Detailseite nicht pro Aufruf MAX(created_at) ueber die Nachrichten bilden muessen.
+    updated_at des Auftrags bleibt dabei unveraendert.
+    """
+    orders = Order.__table__
+    connection.execute(
+        orders.update()
+        .where(orders.c.id == target.order_id)
+        .where(or_(orders.c.last_message_at.is_(None), orders.c.last_message_at < target.created_at))
+        .values(last_message_at=target.created_at, updated_at=orders.c.updated_at)
+    )
+
 
 # --- OrderReadStatus (wann hat welcher User den Auftrag zuletzt gelesen) -----
 
@@ -327,13 +477,20 @@ class OrderReadStatus(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
-    last_read_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_read_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        server_default=db.func.current_timestamp(),
+    )
 
     order = db.relationship("Order")
     user = db.relationship("User")
 
     __table_args__ = (
         db.UniqueConstraint("order_id", "user_id", name="uq_order_user"),
+        # Dashboard: Lese-Status des Users fuer die Auftraege der Seite, ohne Tabellenzugriff
+        db.Index("ix_order_read_status_user_order", "user_id", "order_id", "last_read_at"),
     )
 
 
@@ -391,13 +548,14 @@ class OrderFile(db.Model):
 
     # Dateinamen
     original_name = db.Column(db.String(255), nullable=False)  # vom User hochgeladen
-    stored_name = db.Column(db.String(255), nullable=False)    # technischer Name auf Platte (mit ID-Präfix)
+    stored_name = db.Column(db.String(255), nullable=False)    # technischer Name auf Platte (mit eindeutigem Präfix)
 
     # Metadaten
     file_type = db.Column(db.String(20))   # z.B. 'stl' oder '3mf'
     material_id = db.Column(db.Integer, db.ForeignKey("materials.id"))
     color_id = db.Column(db.Integer, db.ForeignKey("colors.id"))
     filesize = db.Column(db.Integer)       # in Bytes
+    sha256 = db.Column(db.String(64), index=True)  # Inhalts-Hash (Deduplizierung)
     note = db.Column(db.String(255))       # Bemerkung zum Modell
     quantity = db.Column(db.Integer, nullable=False, default=1)  # benötigte Anzahl
     thumb_sm_path = db.Column(db.String(255))
@@ -495,6 +653,11 @@ class Material(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.String(255))  # Kurzbeschreibung / Notizen
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @validates("name")
+    def _normalize_name(self, _key, value):
+        return value.strip() if isinstance(value, str) else value
 
     def __repr__(self):
         return f"<Material {self.name}>"
@@ -508,6 +671,11 @@ class Color(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     hex_code = db.Column(db.String(7))  # z.B. '#FF0000'
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @validates("name")
+    def _normalize_name(self, _key, value):
+        return value.strip() if isinstance(value, str) else value
 
     def __repr__(self):
         return f"<Color {self.name}>"
@@ -525,6 +693,15 @@ class CostCenter(db.Model):
     email = db.Column(db.Text)
     is_active = db.Column(db.Boolean, nullable=False, default=True)
 
+    # Ausdrucks-Index fuer die case-insensitive Namenspruefung (func.lower(name) == ...)
+    __table_args__ = (
+        db.Index("ix_cost_centers_name_lower", db.func.lower(name)),
+    )
+
+    @validates("name")
+    def _normalize_name(self, _key, value):
+        return value.strip() if isinstance(value, str) else value
+
     def __repr__(self):
         return f"<CostCenter {self.name}>"
 
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 import hashlib
+import io
 import os
 import secrets
 import json
 import shutil
-from typing import Callable, Optional
+from typing import Callable, Iterable, Iterator, Optional
 from urllib.parse import parse_qs, urlparse
 import smtplib
 from email.message import EmailMessage
@@ -20,11 +22,13 @@ from flask import (
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 from flask_login import current_user
-from sqlalchemy import and_, func, or_
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import and_, func, insert, or_
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import load_only, raiseload, selectinload
 from werkzeug.utils import secure_filename
 
 from auth_utils import roles_required
@@ -55,9 +59,12 @@ from config import (
     normalize_email_actions,
     save_app_settings,
 )
+from http_cache import conditional_page, page_etag
+from lookup_cache import invalidate_lookup_cache
 from schema_utils import ensure_training_playlist_schema, reset_order_id_sequence
 from status_messages import (
     STATUS_GROUP_DEFS,
+    STATUS_GROUP_KEYS,
     STATUS_STYLE_OPTIONS,
     build_status_context,
     default_label,
@@ -95,6 +102,7 @@ from models import (
     UserOrderCategoryPermission,
     UserOrderAreaPreference,
     db,
+    hash_password,
 )
 from notifications import send_user_activation_notification, send_user_welcome_notification
 from version import APP_VERSION
@@ -260,6 +268,178 @@ def _build_simple_text_pdf(lines: list[str]) -> bytes:
     return b"".join(pdf_parts)
 
 
+# Zeilen pro DB-Batch beim Streaming-Export der Stammdaten
+EXPORT_BATCH_SIZE = 500
+
+
+# Mit indent nutzt json.dumps den reinen Python-Encoder; flache Export-Zeilen werden
+# daher feldweise mit dem C-Encoder kodiert und selbst eingerueckt.
+_encode_json_value = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _indented_export_row(row: dict) -> str:
+    if not row:
+        return "{}"
+    if any(isinstance(value, (dict, list, tuple)) for value in row.values()):
+        return json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+    fields = ",\n      ".join(
+        f"{_encode_json_value(str(key))}: {_encode_json_value(value)}" for key, value in row.items()
+    )
+    return "{\n      " + fields + "\n    }"
+
+
+def _iter_json_export(key: str, rows: Iterable[dict]) -> Iterator[str]:
+    """
+    Liefert dasselbe JSON wie json.dumps({"version": ..., key: [...]}, indent=2),
+    aber stückweise, damit große Exporte nicht komplett im Speicher liegen.
+    """
+    yield "{\n" + f'  "version": {json.dumps(APP_VERSION, ensure_ascii=False)},\n  {json.dumps(key)}: ['
+    first = True
+    for row in rows:
+        item = _indented_export_row(row)
+        yield ("\n    " if first else ",\n    ") + item
+        first = False
+    yield ("]" if first else "\n  ]") + "\n}"
+
+
+def _json_export_response(key: str, rows: Iterable[dict], filename: str):
+    return current_app.response_class(
+        stream_with_context(_iter_json_export(key, rows)),
+        mimetype="application/json",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def _load_json_upload(file_storage):
+    """
+    Parst eine hochgeladene JSON-Datei direkt aus dem Upload-Stream, ohne den
+    Inhalt vorher komplett als bytes und str im Speicher zu halten.
+    """
+    wrapper = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig")
+    try:
+        return json.load(wrapper)
+    finally:
+        # Stream gehoert weiter Werkzeug; nicht mit dem Wrapper schliessen
+        wrapper.detach()
+
+
+def _replace_all_rows(model, mappings: list) -> None:
+    """
+    Ersetzt den kompletten Tabelleninhalt (DELETE + ein executemany-INSERT) in
+    einer Transaktion; bei Fehlern bleibt der alte Bestand erhalten.
+    """
+    try:
+        with db.session.no_autoflush:
+            model.query.delete(synchronize_session=False)
+            if mappings:
+                db.session.execute(insert(model), mappings)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _commit_unless_duplicate() -> bool:
+    """
+    Committet die Session. Verletzt der Commit einen UNIQUE-Constraint (z.B. doppelter
+    Name), wird zurueckgerollt und False geliefert - ohne vorheriges Existenz-SELECT.
+    """
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
+
+
+# Anzahl User pro Seite in der Admin-Userliste
+ADMIN_USER_PAGE_SIZE = 50
+# Anzahl Auftraege pro Seite in der Admin-Auftragsverwaltung
+ADMIN_ORDER_PAGE_SIZE = 50
+# Anzahl Eintraege pro Seite in den Stammdaten-Listen (Material/Farbe)
+ADMIN_MASTER_DATA_PAGE_SIZE = 50
+
+# Obergrenze paralleler Passwort-Hashes beim User-Import (hashlib/argon2 geben dabei den GIL frei)
+PASSWORD_HASH_WORKERS = 4
+
+
+def _hash_passwords(passwords: list) -> list:
+    """
+    Berechnet die Passwort-Hashes fuer mehrere Klartext-Passwoerter parallel.
+    Laeuft ausserhalb jeder Schreibtransaktion, damit SQLite waehrenddessen nicht gesperrt ist.
+    """
+    if len(passwords) <= 1:
+        return [hash_password(pw) for pw in passwords]
+    with ThreadPoolExecutor(max_workers=min(PASSWORD_HASH_WORKERS, len(passwords))) as pool:
+        return list(pool.map(hash_password, passwords))
+
+
+def _master_data_list_response(model, template: str, context_name: str, endpoint: str):
+    """
+    Rendert eine Stammdaten-Liste (Material/Farbe) seitenweise als Conditional GET.
+    Der ETag haengt an Seite, Anzahl, max(id) und max(updated_at) der Tabelle; bei
+    Treffer entfallen Listen-Query und Template-Rendering.
+    """
+    page = max(1, request.args.get("page", 1, type=int) or 1)
+    count, max_id, max_updated = db.session.query(
+        func.count(model.id), func.max(model.id), func.max(model.updated_at)
+    ).one()
+    etag = page_etag(model.__tablename__, page, count, max_id, max_updated)
+
+    def render():
+        items = (
+            model.query.order_by(model.name.asc(), model.id.asc())
+            .offset((page - 1) * ADMIN_MASTER_DATA_PAGE_SIZE)
+            .limit(ADMIN_MASTER_DATA_PAGE_SIZE)
+            .all()
+        )
+        return render_template(
+            template,
+            **{context_name: items},
+            pagination_endpoint=endpoint,
+            prev_page=page - 1 if page > 1 else None,
+            next_page=page + 1 if page * ADMIN_MASTER_DATA_PAGE_SIZE < count else None,
+        )
+
+    return conditional_page(etag, render)
+
+
+def _bulk_delete_by_ids(model, raw_ids: Iterable[int]) -> int:
+    """
+    Loescht mehrere Stammdaten-Zeilen mit einem DELETE ... WHERE id IN (...) und einem Commit.
+    Liefert die Anzahl geloeschter Zeilen.
+    """
+    ids = {row_id for row_id in raw_ids if row_id}
+    if not ids:
+        return 0
+    deleted = model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    invalidate_lookup_cache()
+    return deleted
+
+
+def _clean_str(entry: dict, key: str) -> Optional[str]:
+    """Getrimmter String-Wert aus einem Import-Eintrag oder None."""
+    return (entry.get(key) or "").strip() or None
+
+
+# Freitext-Profilfelder aus den Admin-User-Formularen (leere Werte werden zu None)
+USER_PROFILE_FORM_FIELDS = (
+    "salutation",
+    "first_name",
+    "last_name",
+    "address",
+    "position",
+    "cost_center",
+    "study_program",
+    "note",
+)
+
+
+def _user_profile_form_values(form) -> dict:
+    return {key: form.get(key) or None for key in USER_PROFILE_FORM_FIELDS}
+
+
 def _activation_token_hash(token: str) -> str:
     return hashlib.sha256((token or "").encode("utf-8")).hexdigest()
 
@@ -600,7 +780,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_panel():
         """Einfache Admin-Startseite."""
-        return render_template("admin.html")
+        return conditional_page(page_etag("admin.html"), lambda: render_template("admin.html"))
 
     @bp.route("/design-smoke-test", endpoint="admin_design_smoke_test")
     @roles_required("admin")
@@ -612,7 +792,10 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_3d_print_master_data():
         """Grouped master data area for 3D printing."""
-        return render_template("admin_3d_print_master_data.html")
+        return conditional_page(
+            page_etag("admin_3d_print_master_data.html"),
+            lambda: render_template("admin_3d_print_master_data.html"),
+        )
 
     @bp.route("/plotter-master-data", endpoint="admin_plotter_master_data")
     @roles_required("admin")
@@ -624,11 +807,24 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_orders():
         """Admin order archive/delete management."""
+        status_filter = (request.args.get("status") or "").strip()
+        if status_filter not in STATUS_GROUP_KEYS["order"]:
+            status_filter = ""
+        page = max(1, request.args.get("page", 1, type=int) or 1)
+
+        query = Order.query.options(selectinload(Order.user))
+        if status_filter:
+            query = query.filter(Order.status == status_filter)
+        # Eine Zeile mehr laden, um ohne COUNT(*) zu wissen, ob es weitergeht
         orders = (
-            Order.query
+            query
             .order_by(Order.is_archived.asc(), Order.created_at.desc(), Order.id.desc())
+            .offset((page - 1) * ADMIN_ORDER_PAGE_SIZE)
+            .limit(ADMIN_ORDER_PAGE_SIZE + 1)
             .all()
         )
+        has_next_page = len(orders) > ADMIN_ORDER_PAGE_SIZE
+        orders = orders[:ADMIN_ORDER_PAGE_SIZE]
         order_ids = [order.id for order in orders]
         print_job_counts = {}
         if order_ids:
@@ -651,13 +847,21 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 if status in ("started", "finished", "error"):
                     summary[status] += count
 
-        return render_template("admin_orders.html", orders=orders, print_job_counts=print_job_counts)
+        return render_template(
+            "admin_orders.html",
+            orders=orders,
+            print_job_counts=print_job_counts,
+            status_filter=status_filter,
+            page_args={"status": status_filter} if status_filter else {},
+            prev_page=page - 1 if page > 1 else None,
+            next_page=page + 1 if has_next_page else None,
+        )
 
     @bp.route("/orders/<int:order_id>/archive", methods=["POST"], endpoint="admin_order_archive")
     @roles_required("admin")
     def admin_order_archive(order_id: int):
         trans = t
-        order = Order.query.get_or_404(order_id)
+        order = db.get_or_404(Order, order_id)
         if not order.is_archived:
             order.is_archived = True
             order.archived_at = datetime.utcnow()
@@ -677,7 +881,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_order_delete(order_id: int):
         trans = t
-        order = Order.query.get_or_404(order_id)
+        order = db.get_or_404(Order, order_id)
         order_title = order.title
         try:
             write_audit_log(
@@ -1121,7 +1325,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 except ValueError:
                     area_id = 0
 
-                area = OrderArea.query.get(area_id) if area_id else None
+                area = db.session.get(OrderArea, area_id) if area_id else None
                 if not area:
                     flash(trans("flash_area_not_found"), "warning")
                 elif not area_name:
@@ -1151,7 +1355,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 except ValueError:
                     area_id = 0
 
-                area = OrderArea.query.get(area_id) if area_id else None
+                area = db.session.get(OrderArea, area_id) if area_id else None
                 if not area:
                     flash(trans("flash_area_not_found"), "warning")
                 else:
@@ -1498,7 +1702,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
         trans = t
         if not consume_admin_announcement_form_token():
             return reject_duplicate_admin_announcement_submission()
-        announcement = Announcement.query.get_or_404(announcement_id)
+        announcement = db.get_or_404(Announcement, announcement_id)
         title = (request.form.get("title") or "").strip()
         body = (request.form.get("body") or "").strip()
         priority = (request.form.get("priority") or "info").strip()
@@ -1523,7 +1727,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_announcement_delete(announcement_id):
         trans = t
-        announcement = Announcement.query.get_or_404(announcement_id)
+        announcement = db.get_or_404(Announcement, announcement_id)
         AnnouncementRead.query.filter_by(announcement_id=announcement.id).delete()
         db.session.delete(announcement)
         db.session.commit()
@@ -1694,7 +1898,45 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
         elif status_filter == "inactive":
             query = query.filter(User.deleted_at.is_(None), User.is_active.is_(False))
 
-        users = query.order_by(User.id.asc()).all()
+        # Die Liste zeigt keine Auftraege an; ein spaeterer Zugriff auf user.orders im
+        # Template soll sofort auffallen statt pro User ein SELECT auszuloesen (N+1).
+        # Nur die in admin_users.html angezeigten Spalten laden (kein password_hash, note, ...)
+        query = query.options(
+            load_only(
+                User.id,
+                User.email,
+                User.first_name,
+                User.last_name,
+                User.role,
+                User.is_active,
+                User.deleted_at,
+                User.created_at,
+                User.last_login_at,
+            ),
+            raiseload(User.orders, sql_only=True),
+        )
+
+        # Keyset-Pagination ueber User.id (kein OFFSET): after_id blaettert vor, before_id zurueck
+        after_id = request.args.get("after_id", type=int)
+        before_id = request.args.get("before_id", type=int)
+        if before_id:
+            users = (
+                query.filter(User.id < before_id)
+                .order_by(User.id.desc())
+                .limit(ADMIN_USER_PAGE_SIZE + 1)
+                .all()
+            )
+            has_prev_page = len(users) > ADMIN_USER_PAGE_SIZE
+            users = users[:ADMIN_USER_PAGE_SIZE][::-1]
+            has_next_page = True
+        else:
+            if after_id:
+                query = query.filter(User.id > after_id)
+            users = query.order_by(User.id.asc()).limit(ADMIN_USER_PAGE_SIZE + 1).all()
+            has_next_page = len(users) > ADMIN_USER_PAGE_SIZE
+            users = users[:ADMIN_USER_PAGE_SIZE]
+            has_prev_page = bool(after_id)
+
         filters = {
             "q": search_query,
             "role": role_filter,
@@ -1702,6 +1944,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             "date_from": date_from_raw,
             "date_to": date_to_raw,
         }
+        page_args = {key: value for key, value in filters.items() if value}
         status_filter_options = [
             ("", trans("dashboard_filter_all")),
             ("active", trans("user_status_active")),
@@ -1712,6 +1955,9 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             "admin_users.html",
             users=users,
             filters=filters,
+            page_args=page_args,
+            prev_page_before_id=users[0].id if users and has_prev_page else None,
+            next_page_after_id=users[-1].id if users and has_next_page else None,
             role_options=USER_ROLE_OPTIONS,
             status_filter_options=status_filter_options,
         )
@@ -1799,6 +2045,20 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             except Exception:
                 return None
 
+        # Bestehende User mit einer IN-Query laden; Passwoerter erst nach der Schleife
+        # hashen, damit keine Autoflush-Schreibsperre waehrend des Hashings offen ist
+        emails = {
+            (entry.get("email") or "").strip().lower()
+            for entry in rows
+            if isinstance(entry, dict)
+        }
+        emails.discard("")
+        users_by_email = {
+            user.email: user
+            for user in (User.query.filter(User.email.in_(emails)).all() if emails else [])
+        }
+        pending_passwords: list[tuple[User, str]] = []
+
         for entry in rows:
             if not isinstance(entry, dict):
                 skipped += 1
@@ -1809,10 +2069,11 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 skipped += 1
                 continue
 
-            user = User.query.filter_by(email=email).first()
+            user = users_by_email.get(email)
             is_new = False
             if not user:
                 user = User(email=email, role="user")
+                users_by_email[email] = user
                 is_new = True
 
             user.role = (entry.get("role") or user.role or "user").strip() or "user"
@@ -1828,21 +2089,21 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 entry.get("pickup_hours_enabled", getattr(user, "pickup_hours_enabled", False)),
                 False,
             )
-            user.pickup_hours_text = (entry.get("pickup_hours_text") or "").strip() or None
+            user.pickup_hours_text = _clean_str(entry, "pickup_hours_text")
             user.pickup_contact_enabled = coerce_bool(
                 entry.get("pickup_contact_enabled", getattr(user, "pickup_contact_enabled", False)),
                 False,
             )
-            user.pickup_contact_text = (entry.get("pickup_contact_text") or "").strip() or None
+            user.pickup_contact_text = _clean_str(entry, "pickup_contact_text")
 
-            user.salutation = (entry.get("salutation") or "").strip() or None
-            user.first_name = (entry.get("first_name") or "").strip() or None
-            user.last_name = (entry.get("last_name") or "").strip() or None
-            user.address = (entry.get("address") or "").strip() or None
-            user.position = (entry.get("position") or "").strip() or None
-            user.cost_center = (entry.get("cost_center") or "").strip() or None
-            user.study_program = (entry.get("study_program") or "").strip() or None
-            user.note = (entry.get("note") or "").strip() or None
+            user.salutation = _clean_str(entry, "salutation")
+            user.first_name = _clean_str(entry, "first_name")
+            user.last_name = _clean_str(entry, "last_name")
+            user.address = _clean_str(entry, "address")
+            user.position = _clean_str(entry, "position")
+            user.cost_center = _clean_str(entry, "cost_center")
+            user.study_program = _clean_str(entry, "study_program")
+            user.note = _clean_str(entry, "note")
 
             created_at = parse_dt(entry.get("created_at"))
             if created_at:
@@ -1855,11 +2116,11 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             raw_pw_hash = (entry.get("password_hash") or "").strip()
             raw_pw_plain = (entry.get("password") or "").strip()
             if raw_pw_plain:
-                user.set_password(raw_pw_plain)
+                pending_passwords.append((user, raw_pw_plain))
             elif raw_pw_hash:
                 user.password_hash = raw_pw_hash
             elif is_new and not user.password_hash:
-                user.set_password(secrets.token_urlsafe(12))
+                pending_passwords.append((user, secrets.token_urlsafe(12)))
 
             if is_new:
                 db.session.add(user)
@@ -1869,6 +2130,10 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 imported_updated.append(user)
                 updated += 1
 
+        hashes = _hash_passwords([password for _user, password in pending_passwords])
+        for (user, _password), password_hash in zip(pending_passwords, hashes):
+            user.password_hash = password_hash
+
         db.session.commit()
         for user in imported_created:
             write_audit_log(
@@ -1919,7 +2184,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 flash(trans("flash_email_required"), "danger")
             elif not password:
                 flash(trans("flash_password_required"), "danger")
-            elif User.query.filter_by(email=email).first():
+            elif User.email_taken(email):
                 flash(trans("flash_user_email_exists"), "danger")
             else:
                 account_activation_required = bool(settings.get("account_activation_required", True))
@@ -1928,14 +2193,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                     role="admin",
                     language=language,
                     is_active=not account_activation_required,
-                    salutation=request.form.get("salutation") or None,
-                    first_name=request.form.get("first_name") or None,
-                    last_name=request.form.get("last_name") or None,
-                    address=request.form.get("address") or None,
-                    position=request.form.get("position") or None,
-                    cost_center=request.form.get("cost_center") or None,
-                    study_program=request.form.get("study_program") or None,
-                    note=request.form.get("note") or None,
+                    **_user_profile_form_values(request.form),
                 )
                 user.set_password(password)
                 db.session.add(user)
@@ -1977,7 +2235,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_user_edit(user_id):
         """User-Daten bearbeiten (Admin)."""
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
 
         if request.method == "POST":
             trans = t
@@ -1994,30 +2252,23 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                         flash(trans("flash_user_activation_link_failed"), "warning")
                 return redirect(url_for(".admin_user_edit", user_id=user.id))
 
-            email = request.form.get("email", "").strip().lower()
-            role = request.form.get("role", "user").strip()
+            form = request.form
+            email = form.get("email", "").strip().lower()
+            role = form.get("role", "user").strip()
             if role not in USER_ROLE_VALUES:
                 role = "user"
-            language = (request.form.get("language") or user.language or "en").strip().lower()
+            language = (form.get("language") or user.language or "en").strip().lower()
             if language not in USER_LANGUAGE_VALUES:
                 language = "en"
-            new_password = request.form.get("password", "")
-
-            salutation = request.form.get("salutation") or None
-            first_name = request.form.get("first_name") or None
-            last_name = request.form.get("last_name") or None
-            address = request.form.get("address") or None
-            position = request.form.get("position") or None
-            cost_center = request.form.get("cost_center") or None
-            study_program = request.form.get("study_program") or None
-            note = request.form.get("note") or None
-            is_active = bool(request.form.get("is_active"))
+            new_password = form.get("password", "")
+            profile_values = _user_profile_form_values(form)
+            is_active = bool(form.get("is_active"))
 
             if not email:
                 flash(trans("flash_email_required"), "danger")
             else:
-                existing = User.query.filter_by(email=email).first()
-                if existing and existing.id != user.id:
+                # Unveraenderte E-Mail braucht keine Dublettenpruefung
+                if email != user.email and User.email_taken(email, exclude_id=user.id):
                     flash(trans("flash_user_email_exists"), "danger")
                 else:
                     before = {
@@ -2038,21 +2289,15 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                     user.language = language
                     user.is_active = is_active
 
-                    user.salutation = salutation
-                    user.first_name = first_name
-                    user.last_name = last_name
-                    user.address = address
-                    user.position = position
-                    user.cost_center = cost_center
-                    user.study_program = study_program
-                    user.note = note
+                    for key, value in profile_values.items():
+                        setattr(user, key, value)
 
                     if new_password:
                         user.set_password(new_password)
 
                     if user.role == "worker":
                         selected_ids = set()
-                        for raw_id in request.form.getlist("worker_category_ids"):
+                        for raw_id in form.getlist("worker_category_ids"):
                             try:
                                 selected_ids.add(int(raw_id))
                             except (TypeError, ValueError):
@@ -2130,7 +2375,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_user_activate(user_id):
         trans = t
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
         if user.deleted_at is not None:
             flash(trans("flash_user_deleted_cannot_activate"), "warning")
             return redirect(url_for(".admin_user_list"))
@@ -2159,7 +2404,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_user_deactivate(user_id):
         trans = t
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
         if user.id == current_user.id:
             flash(trans("flash_user_self_status_forbidden"), "danger")
             return redirect(url_for(".admin_user_list"))
@@ -2194,7 +2439,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_user_delete(user_id):
         trans = t
-        user = User.query.get_or_404(user_id)
+        user = db.get_or_404(User, user_id)
         if user.id == current_user.id:
             flash(trans("flash_user_self_status_forbidden"), "danger")
             return redirect(url_for(".admin_user_list"))
@@ -2231,28 +2476,19 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @bp.route("/materials", endpoint="admin_material_list")
     @roles_required("admin")
     def admin_material_list():
-        materials = Material.query.order_by(Material.name.asc()).all()
-        return render_template("admin_materials.html", materials=materials)
+        return _master_data_list_response(Material, "admin_materials.html", "materials", "admin.admin_material_list")
 
     @bp.route("/materials/export", endpoint="admin_material_export")
     @roles_required("admin")
     def admin_material_export():
         """Exportiert alle Materialien als JSON (name, description) mit Versionsinfo."""
-        materials = Material.query.order_by(Material.name.asc()).all()
-        payload = {
-            "version": APP_VERSION,
-            "materials": [
-                {"name": m.name, "description": m.description or ""}
-                for m in materials
-            ],
-        }
-        output = json.dumps(payload, ensure_ascii=False, indent=2)
-
-        return current_app.response_class(
-            output,
-            mimetype="application/json",
-            headers={"Content-Disposition": "attachment; filename=NeoFab_materials.json"},
+        rows = (
+            {"name": name, "description": description or ""}
+            for name, description in db.session.query(Material.name, Material.description)
+            .order_by(Material.name.asc())
+            .yield_per(EXPORT_BATCH_SIZE)
         )
+        return _json_export_response("materials", rows, "NeoFab_materials.json")
 
     @bp.route("/materials/import", methods=["POST"], endpoint="admin_material_import")
     @roles_required("admin")
@@ -2272,30 +2508,35 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             return redirect(url_for(".admin_material_list"))
 
         try:
-            content = file.read().decode("utf-8-sig")
-            data = json.loads(content)
+            data = _load_json_upload(file)
         except Exception:
             flash(trans("flash_invalid_json"), "danger")
             return redirect(url_for(".admin_material_list"))
 
         rows = data.get("materials", []) if isinstance(data, dict) else []
 
-        # Bestehende Materialien vor Import leeren
-        Material.query.delete()
-
-        created = skipped = 0
+        # Zeilen vorab aufbereiten (ohne Namen bzw. doppelte Namen werden uebersprungen)
+        mappings = {}
         for entry in rows:
-            name = (entry.get("name") or "").strip() if isinstance(entry, dict) else ""
-            description = (entry.get("description") or "").strip() if isinstance(entry, dict) else None
-
-            if not name:
-                skipped += 1
+            if not isinstance(entry, dict):
                 continue
+            name = (entry.get("name") or "").strip()
+            if name and name not in mappings:
+                mappings[name] = {
+                    "name": name,
+                    "description": _clean_str(entry, "description"),
+                }
+        created = len(mappings)
+        skipped = len(rows) - created
 
-            db.session.add(Material(name=name, description=description or None))
-            created += 1
-
-        db.session.commit()
+        # Bestehende Materialien vor Import leeren, dann alle Zeilen als ein executemany einfuegen
+        try:
+            _replace_all_rows(Material, list(mappings.values()))
+        except Exception:
+            current_app.logger.exception("Failed to import materials")
+            flash(trans("flash_import_failed"), "danger")
+            return redirect(url_for(".admin_material_list"))
+        invalidate_lookup_cache()
         flash(trans("flash_import_result_simple").format(created=created, skipped=skipped), "success")
         return redirect(url_for(".admin_material_list"))
 
@@ -2310,15 +2551,12 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             if not name:
                 flash(trans("flash_material_required"), "danger")
             else:
-                existing = Material.query.filter_by(name=name).first()
-                if existing:
-                    flash(trans("flash_material_exists"), "danger")
-                else:
-                    m = Material(name=name, description=description)
-                    db.session.add(m)
-                    db.session.commit()
+                db.session.add(Material(name=name, description=description))
+                if _commit_unless_duplicate():
+                    invalidate_lookup_cache()
                     flash(trans("flash_material_created"), "success")
                     return redirect(url_for(".admin_material_list"))
+                flash(trans("flash_material_exists"), "danger")
 
         return render_template("admin_material_edit.html", material=None)
 
@@ -2326,7 +2564,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_material_edit(material_id):
         trans = t
-        material = Material.query.get_or_404(material_id)
+        material = db.get_or_404(Material, material_id)
 
         if request.method == "POST":
             name = request.form.get("name", "").strip()
@@ -2335,15 +2573,13 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             if not name:
                 flash(trans("flash_material_required"), "danger")
             else:
-                existing = Material.query.filter_by(name=name).first()
-                if existing and existing.id != material.id:
-                    flash(trans("flash_material_exists"), "danger")
-                else:
-                    material.name = name
-                    material.description = description
-                    db.session.commit()
+                material.name = name
+                material.description = description
+                if _commit_unless_duplicate():
+                    invalidate_lookup_cache()
                     flash(trans("flash_material_updated"), "success")
                     return redirect(url_for(".admin_material_list"))
+                flash(trans("flash_material_exists"), "danger")
 
         return render_template("admin_material_edit.html", material=material)
 
@@ -2351,12 +2587,19 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_material_delete(material_id):
         trans = t
-        material = Material.query.get_or_404(material_id)
-        db.session.delete(material)
-        db.session.commit()
+        material = db.get_or_404(Material, material_id)
+        _bulk_delete_by_ids(Material, [material.id])
         flash(trans("flash_material_deleted"), "info")
         return redirect(url_for(".admin_material_list"))
 
+    @bp.route("/materials/bulk-delete", methods=["POST"], endpoint="admin_material_bulk_delete")
+    @roles_required("admin")
+    def admin_material_bulk_delete():
+        trans = t
+        deleted = _bulk_delete_by_ids(Material, request.form.getlist("ids", type=int))
+        flash(trans("flash_bulk_deleted").format(count=deleted), "info")
+        return redirect(url_for(".admin_material_list"))
+
     # Printer Profiles -----------------------------------------------------
 
     @bp.route("/printer-profiles", endpoint="admin_printer_profile_list")
@@ -2424,7 +2667,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 continue
 
             name = (entry.get("name") or "").strip()
-            description = (entry.get("description") or "").strip() or None
+            description = _clean_str(entry, "description")
             time_factor = _parse_nonnegative_float(entry.get("time_factor"), 1.0)
             time_offset_min_raw = entry.get("time_offset_min", 0)
             machine_hourly_rate = _parse_nonnegative_float(entry.get("machine_hourly_rate"), 0.0)
@@ -2546,7 +2789,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_printer_profile_edit(profile_id):
         trans = t
-        profile = PrinterProfile.query.get_or_404(profile_id)
+        profile = db.get_or_404(PrinterProfile, profile_id)
 
         def parse_nonnegative_float(raw_value):
             try:
@@ -2620,7 +2863,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_printer_profile_delete(profile_id):
         trans = t
-        profile = PrinterProfile.query.get_or_404(profile_id)
+        profile = db.get_or_404(PrinterProfile, profile_id)
         db.session.delete(profile)
         db.session.commit()
         flash(trans("flash_printer_profile_deleted"), "info")
@@ -2694,7 +2937,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 continue
 
             name = (entry.get("name") or "").strip()
-            description = (entry.get("description") or "").strip() or None
+            description = _clean_str(entry, "description")
             filament_diameter_mm = _parse_nonnegative_float(entry.get("filament_diameter_mm"), 1.75)
             density_g_cm3 = _parse_nonnegative_float(entry.get("density_g_cm3"), None)
             price_per_kg = _parse_nonnegative_float(entry.get("price_per_kg"), 0.0)
@@ -2809,7 +3052,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_filament_material_edit(material_id):
         trans = t
-        material = FilamentMaterial.query.get_or_404(material_id)
+        material = db.get_or_404(FilamentMaterial, material_id)
 
         if request.method == "POST":
             name = request.form.get("name", "").strip()
@@ -2874,7 +3117,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_filament_material_delete(material_id):
         trans = t
-        material = FilamentMaterial.query.get_or_404(material_id)
+        material = db.get_or_404(FilamentMaterial, material_id)
         db.session.delete(material)
         db.session.commit()
         flash(trans("flash_filament_material_deleted"), "info")
@@ -2936,7 +3179,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 skipped += 1
                 continue
             name = (entry.get("name") or "").strip()
-            description = (entry.get("description") or "").strip() or None
+            description = _clean_str(entry, "description")
             price_per_m2 = _parse_nonnegative_float(entry.get("price_per_m2"), 0.0)
             if price_per_m2 == 0 and entry.get("price_per_cm2") not in (None, ""):
                 price_per_cm2 = _parse_nonnegative_float(entry.get("price_per_cm2"), 0.0)
@@ -2997,7 +3240,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_plotter_paper_edit(paper_id):
         trans = t
-        paper = PlotterPaper.query.get_or_404(paper_id)
+        paper = db.get_or_404(PlotterPaper, paper_id)
         if request.method == "POST":
             name = request.form.get("name", "").strip()
             description = request.form.get("description", "").strip() or None
@@ -3032,7 +3275,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_plotter_paper_delete(paper_id):
         trans = t
-        paper = PlotterPaper.query.get_or_404(paper_id)
+        paper = db.get_or_404(PlotterPaper, paper_id)
         db.session.delete(paper)
         db.session.commit()
         flash(trans("flash_plotter_paper_deleted"), "info")
@@ -3098,7 +3341,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 skipped += 1
                 continue
             name = (entry.get("name") or "").strip()
-            description = (entry.get("description") or "").strip() or None
+            description = _clean_str(entry, "description")
             default_paper_name = (entry.get("default_paper") or entry.get("default_paper_name") or "").strip()
             default_paper = None
             if default_paper_name:
@@ -3184,10 +3427,10 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_plotter_type_edit(plotter_type_id):
         trans = t
-        plotter_type = PlotterType.query.get_or_404(plotter_type_id)
+        plotter_type = db.get_or_404(PlotterType, plotter_type_id)
         plotter_papers = PlotterPaper.query.filter_by(active=True).order_by(PlotterPaper.name.asc()).all()
         if plotter_type.default_paper_id and not any(paper.id == plotter_type.default_paper_id for paper in plotter_papers):
-            selected_paper = PlotterPaper.query.get(plotter_type.default_paper_id)
+            selected_paper = db.session.get(PlotterPaper, plotter_type.default_paper_id)
             if selected_paper:
                 plotter_papers.append(selected_paper)
                 plotter_papers.sort(key=lambda item: (item.name or "").lower())
@@ -3215,7 +3458,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 flash(trans("flash_plotter_type_costs_invalid"), "danger")
                 has_errors = True
             if default_paper_id:
-                default_paper = PlotterPaper.query.get(default_paper_id)
+                default_paper = db.session.get(PlotterPaper, default_paper_id)
                 if not default_paper or (not default_paper.active and default_paper.id != plotter_type.default_paper_id):
                     flash(trans("flash_plotter_type_default_paper_invalid"), "danger")
                     has_errors = True
@@ -3239,7 +3482,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_plotter_type_delete(plotter_type_id):
         trans = t
-        plotter_type = PlotterType.query.get_or_404(plotter_type_id)
+        plotter_type = db.get_or_404(PlotterType, plotter_type_id)
         db.session.delete(plotter_type)
         db.session.commit()
         flash(trans("flash_plotter_type_deleted"), "info")
@@ -3250,28 +3493,19 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @bp.route("/colors", endpoint="admin_color_list")
     @roles_required("admin")
     def admin_color_list():
-        colors = Color.query.order_by(Color.name.asc()).all()
-        return render_template("admin_colors.html", colors=colors)
+        return _master_data_list_response(Color, "admin_colors.html", "colors", "admin.admin_color_list")
 
     @bp.route("/colors/export", endpoint="admin_color_export")
     @roles_required("admin")
     def admin_color_export():
         """Exportiert alle Farben als JSON (name, hex_code) mit Versionsinfo."""
-        colors = Color.query.order_by(Color.name.asc()).all()
-        payload = {
-            "version": APP_VERSION,
-            "colors": [
-                {"name": c.name, "hex_code": c.hex_code or ""}
-                for c in colors
-            ],
-        }
-        output = json.dumps(payload, ensure_ascii=False, indent=2)
-
-        return current_app.response_class(
-            output,
-            mimetype="application/json",
-            headers={"Content-Disposition": "attachment; filename=NeoFab_colors.json"},
+        rows = (
+            {"name": name, "hex_code": hex_code or ""}
+            for name, hex_code in db.session.query(Color.name, Color.hex_code)
+            .order_by(Color.name.asc())
+            .yield_per(EXPORT_BATCH_SIZE)
         )
+        return _json_export_response("colors", rows, "NeoFab_colors.json")
 
     @bp.route("/colors/import", methods=["POST"], endpoint="admin_color_import")
     @roles_required("admin")
@@ -3291,16 +3525,15 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             return redirect(url_for(".admin_color_list"))
 
         try:
-            content = file.read().decode("utf-8-sig")
-            data = json.loads(content)
+            data = _load_json_upload(file)
         except Exception:
             flash(trans("flash_invalid_json"), "danger")
             return redirect(url_for(".admin_color_list"))
 
         rows = data.get("colors", []) if isinstance(data, dict) else []
 
-        # Bestehende Farben vor Import leeren
-        Color.query.delete()
+        # Payload nach Namen zusammenfassen: doppelte Namen zaehlen als Update, der letzte Hex-Code gewinnt
+        payload = {}
         created = updated = skipped = 0
         for entry in rows:
             name = (entry.get("name") or "").strip() if isinstance(entry, dict) else ""
@@ -3310,15 +3543,21 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 skipped += 1
                 continue
 
-            color = Color.query.filter_by(name=name).first()
-            if color:
-                color.hex_code = hex_code or None
+            if name in payload:
                 updated += 1
             else:
-                db.session.add(Color(name=name, hex_code=hex_code or None))
                 created += 1
+            payload[name] = {"name": name, "hex_code": hex_code or None}
 
-        db.session.commit()
+        # Bestehende Farben vor Import leeren; der Payload ist bereits nach Namen
+        # eindeutig, daher reicht ein einfaches executemany ohne Lookup/UPSERT
+        try:
+            _replace_all_rows(Color, list(payload.values()))
+        except Exception:
+            current_app.logger.exception("Failed to import colors")
+            flash(trans("flash_import_failed"), "danger")
+            return redirect(url_for(".admin_color_list"))
+        invalidate_lookup_cache()
         flash(
             trans("flash_import_result_extended").format(
                 created=created, updated=updated, skipped=skipped
@@ -3338,15 +3577,12 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             if not name:
                 flash(trans("flash_color_required"), "danger")
             else:
-                existing = Color.query.filter_by(name=name).first()
-                if existing:
-                    flash(trans("flash_color_exists"), "danger")
-                else:
-                    c = Color(name=name, hex_code=hex_code)
-                    db.session.add(c)
-                    db.session.commit()
+                db.session.add(Color(name=name, hex_code=hex_code))
+                if _commit_unless_duplicate():
+                    invalidate_lookup_cache()
                     flash(trans("flash_color_created"), "success")
                     return redirect(url_for(".admin_color_list"))
+                flash(trans("flash_color_exists"), "danger")
 
         return render_template("admin_color_edit.html", color=None)
 
@@ -3354,7 +3590,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_color_edit(color_id):
         trans = t
-        color = Color.query.get_or_404(color_id)
+        color = db.get_or_404(Color, color_id)
 
         if request.method == "POST":
             name = request.form.get("name", "").strip()
@@ -3363,15 +3599,13 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             if not name:
                 flash(trans("flash_color_required"), "danger")
             else:
-                existing = Color.query.filter_by(name=name).first()
-                if existing and existing.id != color.id:
-                    flash(trans("flash_color_exists"), "danger")
-                else:
-                    color.name = name
-                    color.hex_code = hex_code
-                    db.session.commit()
+                color.name = name
+                color.hex_code = hex_code
+                if _commit_unless_duplicate():
+                    invalidate_lookup_cache()
                     flash(trans("flash_color_updated"), "success")
                     return redirect(url_for(".admin_color_list"))
+                flash(trans("flash_color_exists"), "danger")
 
         return render_template("admin_color_edit.html", color=color)
 
@@ -3379,12 +3613,19 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_color_delete(color_id):
         trans = t
-        color = Color.query.get_or_404(color_id)
-        db.session.delete(color)
-        db.session.commit()
+        color = db.get_or_404(Color, color_id)
+        _bulk_delete_by_ids(Color, [color.id])
         flash(trans("flash_color_deleted"), "info")
         return redirect(url_for(".admin_color_list"))
 
+    @bp.route("/colors/bulk-delete", methods=["POST"], endpoint="admin_color_bulk_delete")
+    @roles_required("admin")
+    def admin_color_bulk_delete():
+        trans = t
+        deleted = _bulk_delete_by_ids(Color, request.form.getlist("ids", type=int))
+        flash(trans("flash_bulk_deleted").format(count=deleted), "info")
+        return redirect(url_for(".admin_color_list"))
+
     # Training Videos (Tutorials) ------------------------------------------
 
     @bp.route("/training-videos", endpoint="admin_training_video_list")
@@ -3443,7 +3684,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     def admin_training_playlist_edit(playlist_id):
         trans = t
         ensure_training_playlist_schema()
-        playlist = TrainingPlaylist.query.get_or_404(playlist_id)
+        playlist = db.get_or_404(TrainingPlaylist, playlist_id)
 
         if request.method == "POST":
             title = request.form.get("title", "").strip()
@@ -3468,7 +3709,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     def admin_training_playlist_delete(playlist_id):
         trans = t
         ensure_training_playlist_schema()
-        playlist = TrainingPlaylist.query.get_or_404(playlist_id)
+        playlist = db.get_or_404(TrainingPlaylist, playlist_id)
         TrainingVideo.query.filter_by(playlist_id=playlist.id).update({"playlist_id": None})
         db.session.delete(playlist)
         db.session.commit()
@@ -3544,7 +3785,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                 continue
             title = (entry.get("title") or "").strip()
             youtube_url = (entry.get("youtube_url") or "").strip()
-            description = (entry.get("description") or "").strip() or None
+            description = _clean_str(entry, "description")
             raw_sort = entry.get("sort_order")
             sort_val = None
             try:
@@ -3601,7 +3842,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             youtube_url = request.form.get("youtube_url", "").strip()
             playlist_id_raw = request.form.get("playlist_id") or ""
             playlist_id = int(playlist_id_raw) if playlist_id_raw.isdigit() else None
-            playlist = TrainingPlaylist.query.get(playlist_id) if playlist_id else None
+            playlist = db.session.get(TrainingPlaylist, playlist_id) if playlist_id else None
             selected_playlist_id = playlist.id if playlist else None
             pdf_file = request.files.get("pdf_file")
             has_pdf_upload = bool(pdf_file and pdf_file.filename)
@@ -3667,7 +3908,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     def admin_training_video_edit(video_id):
         trans = t
         ensure_training_playlist_schema()
-        video = TrainingVideo.query.get_or_404(video_id)
+        video = db.get_or_404(TrainingVideo, video_id)
         playlists = TrainingPlaylist.query.order_by(TrainingPlaylist.title.asc()).all()
         selected_playlist_id = video.playlist_id
 
@@ -3677,7 +3918,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             youtube_url = request.form.get("youtube_url", "").strip()
             playlist_id_raw = request.form.get("playlist_id") or ""
             playlist_id = int(playlist_id_raw) if playlist_id_raw.isdigit() else None
-            playlist = TrainingPlaylist.query.get(playlist_id) if playlist_id else None
+            playlist = db.session.get(TrainingPlaylist, playlist_id) if playlist_id else None
             selected_playlist_id = playlist.id if playlist else None
             pdf_file = request.files.get("pdf_file")
             remove_pdf = bool(request.form.get("remove_pdf"))
@@ -3749,7 +3990,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     def admin_training_video_delete(video_id):
         trans = t
         ensure_training_playlist_schema()
-        video = TrainingVideo.query.get_or_404(video_id)
+        video = db.get_or_404(TrainingVideo, video_id)
         _delete_training_pdf(video)
         db.session.delete(video)
         db.session.commit()
@@ -3841,6 +4082,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                     cc = CostCenter(name=name, email=email, note=note, is_active=is_active)
                     db.session.add(cc)
                     db.session.commit()
+                    invalidate_lookup_cache()
                     flash(trans("flash_cost_center_created"), "success")
                     return redirect(url_for(".admin_cost_center_list"))
 
@@ -3856,7 +4098,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_cost_center_edit(cc_id):
         trans = t
-        cost_center = CostCenter.query.get_or_404(cc_id)
+        cost_center = db.get_or_404(CostCenter, cc_id)
 
         if request.method == "POST":
             name = request.form.get("name", "").strip()
@@ -3867,7 +4109,9 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             if not name:
                 flash(trans("flash_cost_center_required"), "danger")
             else:
-                existing = CostCenter.query.filter(func.lower(CostCenter.name) == name.lower()).first()
+                existing = None
+                if name.lower() != (cost_center.name or "").lower():
+                    existing = CostCenter.query.filter(func.lower(CostCenter.name) == name.lower()).first()
                 if existing and existing.id != cost_center.id:
                     flash(trans("flash_cost_center_exists"), "danger")
                 else:
@@ -3876,6 +4120,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
                     cost_center.note = note
                     cost_center.is_active = is_active
                     db.session.commit()
+                    invalidate_lookup_cache()
                     flash(trans("flash_cost_center_updated"), "success")
                     return redirect(url_for(".admin_cost_center_list"))
 
@@ -3894,7 +4139,7 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_cost_center_pdf(cc_id):
         trans = t
-        cost_center = CostCenter.query.get_or_404(cc_id)
+        cost_center = db.get_or_404(CostCenter, cc_id)
         orders, order_costs, total_cost = _cost_center_orders_with_costs(cost_center.id)
         status_context = build_status_context(load_app_settings(current_app), trans)
         status_labels = status_context.get("order_status_labels", {})
@@ -3968,36 +4213,37 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
     @roles_required("admin")
     def admin_cost_center_delete(cc_id):
         trans = t
-        cost_center = CostCenter.query.get_or_404(cc_id)
-        db.session.delete(cost_center)
-        db.session.commit()
+        cost_center = db.get_or_404(CostCenter, cc_id)
+        _bulk_delete_by_ids(CostCenter, [cost_center.id])
         flash(trans("flash_cost_center_deleted"), "info")
         return redirect(url_for(".admin_cost_center_list"))
 
+    @bp.route("/cost-centers/bulk-delete", methods=["POST"], endpoint="admin_cost_center_bulk_delete")
+    @roles_required("admin")
+    def admin_cost_center_bulk_delete():
+        trans = t
+        deleted = _bulk_delete_by_ids(CostCenter, request.form.getlist("ids", type=int))
+        flash(trans("flash_bulk_deleted").format(count=deleted), "info")
+        return redirect(url_for(".admin_cost_center_list"))
+
     @bp.route("/cost-centers/export", endpoint="admin_cost_center_export")
     @roles_required("admin")
     def admin_cost_center_export():
         """Exportiert alle Kostenstellen als JSON mit Versionsinfo."""
-        cost_centers = CostCenter.query.order_by(CostCenter.name.asc()).all()
-        payload = {
-            "version": APP_VERSION,
-            "cost_centers": [
-                {
-                    "name": cc.name,
-                    "note": cc.note or "",
-                    "email": cc.email or "",
-                    "is_active": bool(cc.is_active),
-                }
-                for cc in cost_centers
-            ],
-        }
-        output = json.dumps(payload, ensure_ascii=False, indent=2)
-
-        return current_app.response_class(
-            output,
-            mimetype="application/json",
-            headers={"Content-Disposition": "attachment; filename=NeoFab_cost_centers.json"},
+        rows = (
+            {
+                "name": name,
+                "note": note or "",
+                "email": email or "",
+                "is_active": bool(is_active),
+            }
+            for name, note, email, is_active in db.session.query(
+                CostCenter.name, CostCenter.note, CostCenter.email, CostCenter.is_active
+            )
+            .order_by(CostCenter.name.asc())
+            .yield_per(EXPORT_BATCH_SIZE)
         )
+        return _json_export_response("cost_centers", rows, "NeoFab_cost_centers.json")
 
     @bp.route("/cost-centers/import", methods=["POST"], endpoint="admin_cost_center_import")
     @roles_required("admin")
@@ -4017,39 +4263,37 @@ def create_admin_blueprint(get_translator: Callable[[], Optional[Callable[[str],
             return redirect(url_for(".admin_cost_center_list"))
 
         try:
-            content = file.read().decode("utf-8-sig")
-            data = json.loads(content)
+            data = _load_json_upload(file)
         except Exception:
             flash(trans("flash_invalid_json"), "danger")
             return redirect(url_for(".admin_cost_center_list"))
 
         rows = data.get("cost_centers", []) if isinstance(data, dict) else []
 
-        # Bestehende Kostenstellen vor Import leeren
-        CostCenter.query.delete()
-
-        created = skipped = 0
+        # Zeilen vorab aufbereiten (ohne Namen bzw. doppelte Namen werden uebersprungen)
+        mappings = {}
         for entry in rows:
-            name = (entry.get("name") or "").strip() if isinstance(entry, dict) else ""
-            note = (entry.get("note") or "").strip() if isinstance(entry, dict) else None
-            email = (entry.get("email") or "").strip() if isinstance(entry, dict) else None
-            is_active = bool(entry.get("is_active")) if isinstance(entry, dict) else True
-
-            if not name:
-                skipped += 1
+            if not isinstance(entry, dict):
                 continue
+            name = (entry.get("name") or "").strip()
+            if name and name not in mappings:
+                mappings[name] = {
+                    "name": name,
+                    "note": _clean_str(entry, "note"),
+                    "email": _clean_str(entry, "email"),
+                    "is_active": bool(entry.get("is_active")),
+                }
+        created = len(mappings)
+        skipped = len(rows) - created
 
-            db.session.add(
-                CostCenter(
-                    name=name,
-                    note=note or None,
-                    email=email or None,
-                    is_active=is_active,
-                )
-            )
-            created += 1
-
-        db.session.commit()
+        # Bestehende Kostenstellen vor Import leeren, dann alle Zeilen als ein executemany einfuegen
+        try:
+            _replace_all_rows(CostCenter, list(mappings.values()))
+        except Exception:
+            current_app.logger.exception("Failed to import cost centers")
+            flash(trans("flash_import_failed"), "danger")
+            return redirect(url_for(".admin_cost_center_list"))
+        invalidate_lookup_cache()
         flash(
             trans("flash_import_result_simple").format(
                 created=created, skipped=skipped
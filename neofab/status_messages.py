@@ -35,6 +35,12 @@ STATUS_GROUP_DEFS = {
     "print_job": PRINT_JOB_STATUS_DEFS,
 }
 
+# Gueltige Status-Keys pro Gruppe, einmal beim Import berechnet
+STATUS_GROUP_KEYS = {
+    group_key: frozenset(item["key"] for item in defs)
+    for group_key, defs in STATUS_GROUP_DEFS.items()
+}
+
 STATUS_STYLE_OPTIONS = [
     ("bg-primary", "status_style_primary"),
     ("bg-secondary", "status_style_secondary"),
@@ -78,8 +84,7 @@ def normalize_status_messages(raw) -> Dict[str, Dict[str, Dict[str, str]]]:
 def filter_status_messages(raw) -> Dict[str, Dict[str, Dict[str, str]]]:
     normalized = normalize_status_messages(raw)
     filtered: Dict[str, Dict[str, Dict[str, str]]] = {}
-    for group_key, defs in STATUS_GROUP_DEFS.items():
-        allowed = {item["key"] for item in defs}
+    for group_key, allowed in STATUS_GROUP_KEYS.items():
         group = normalized.get(group_key)
         if not group:
             continue